@@ -0,0 +1,135 @@
+import os
+import sys
+import random
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import assets  # noqa: E402,F401
+from rooms import MapGenerator, Room, DeadendRoom, mirror  # noqa: E402
+
+
+#  rooms.MapGenerator before the frontier sets: both loops retry random
+#  candidates until one fits, and can spin forever on large floors
+class LegacyMapGenerator(MapGenerator):
+    def generate_neighbor(self, index):
+        room = self.rooms[index]
+        neighbors = self.get_surrounding(room.position)
+        if room.position == (0, 0):
+            direction = random.choice(MapGenerator.directions)
+        else:
+            if random.random() > .4:
+                direction = random.choice(MapGenerator.directions)
+            else:
+                direction = random.choice([mirror[i]
+                                           for i, neighbor in enumerate(neighbors)
+                                           if neighbor])
+        if neighbors[direction]:
+            return None
+        return Room((room.position[0] + MapGenerator.neighbor_offsets[direction][0],
+                     room.position[1] + MapGenerator.neighbor_offsets[direction][1]))
+
+    def new_room(self):
+        n = random.random()
+        if n > .4:
+            new_room = self.generate_neighbor(-1)
+        elif n > .2 and len(self.rooms) > 1:
+            new_room = self.generate_neighbor(-2)
+        elif len(self.rooms) > 2:
+            new_room = self.generate_neighbor(random.randint(0, len(self.rooms) - 3))
+        else:
+            new_room = None
+        if new_room is None:
+            return None
+        self.positions[new_room.position] = len(self.rooms)
+        return new_room
+
+    def add_rooms(self, amount):
+        while len(self.rooms) < amount:
+            new_room = self.new_room()
+            while new_room is None:
+                new_room = self.new_room()
+            self.positions[new_room.position] = len(self.rooms)
+            self.rooms.append(new_room)
+
+    def new_deadend(self):
+        index = random.randint(0, len(self.rooms) - 1)
+        if type(self.rooms[index]) is not Room:
+            return None
+        possible_directions = [i for i, neighbor in
+                               enumerate(self.get_surrounding(self.rooms[index].position))
+                               if not neighbor]
+        if len(possible_directions) == 0:
+            return None
+        direction = random.choice(possible_directions)
+        pos = (self.rooms[index].position[0] + MapGenerator.neighbor_offsets[direction][0],
+               self.rooms[index].position[1] + MapGenerator.neighbor_offsets[direction][1])
+        if sum(self.get_surrounding(pos)) != 1:
+            return None
+        return DeadendRoom(pos)
+
+    def add_deadends(self, amount):
+        start_len = len(self.rooms)
+        sorted_distances = []
+
+        while len(self.rooms) - amount < start_len:
+            new_room = self.new_deadend()
+            while new_room is None:
+                new_room = self.new_deadend()
+            self.positions[new_room.position] = len(self.rooms)
+            current_distance = new_room.position[0] + new_room.position[1]
+            for i, (distance, room) in enumerate(sorted_distances):
+                if distance < current_distance:
+                    sorted_distances.insert(i, (current_distance, new_room))
+                    break
+            else:
+                sorted_distances.append((current_distance, new_room))
+            self.rooms.append(new_room)
+
+        for (_, room), type in zip(sorted_distances, MapGenerator.deadend_types):
+            room.type = type
+        for _, room in sorted_distances[len(MapGenerator.deadend_types):]:
+            room.type = "normal"
+
+
+#  Total and slowest single floor time in seconds, and how many floors ran
+#  out of room for their dead ends on every attempt
+def generate_floors(generator_type, amount, deadends, floors):
+    random.seed(0)
+    slowest = 0
+    failures = 0
+    start = perf_counter()
+    for i in range(floors):
+        floor_start = perf_counter()
+        try:
+            generator_type().generate_map(amount, deadends)
+        except ValueError:
+            failures += 1
+        slowest = max(slowest, perf_counter() - floor_start)
+    return perf_counter() - start, slowest, failures
+
+
+#  The legacy generator is skipped on the last size, where it spins forever
+#  on most seeds
+def main(floors=10000):
+    sizes = [(10, 4, True), (20, 5, True), (40, 8, True), (80, 12, True), (160, 20, True),
+             (200, 40, False)]
+
+    print(f"{floors} floors per size")
+    print(f"{'rooms':>6} {'dead ends':>10} {'legacy/s':>10} {'frontier/s':>11} {'speedup':>8} "
+          f"{'legacy max ms':>14} {'frontier max ms':>16} {'failed':>7}")
+    for amount, deadends, legacy in sizes:
+        total, slowest, failures = generate_floors(MapGenerator, amount, deadends, floors)
+        if legacy:
+            legacy_total, legacy_slowest, _ = generate_floors(LegacyMapGenerator,
+                                                              amount, deadends, floors)
+            print(f"{amount:>6} {deadends:>10} {floors / legacy_total:>10,.0f} "
+                  f"{floors / total:>11,.0f} {legacy_total / total:>7.2f}x "
+                  f"{legacy_slowest * 1000:>14.2f} {slowest * 1000:>16.2f} {failures:>7}")
+        else:
+            print(f"{amount:>6} {deadends:>10} {'-':>10} {floors / total:>11,.0f} {'-':>8} "
+                  f"{'-':>14} {slowest * 1000:>16.2f} {failures:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import os
+import sys
+import timeit
+from functools import wraps
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from physics import Vector, Vec2Array  # noqa: E402
+
+
+#  physics.Vector before __slots__, inlined argument conversion and math.sqrt
+def vector_argument(function):
+    @wraps(function)
+    def vector_arg_only(self, arg):
+        if type(arg) is not LegacyVector:
+            arg = LegacyVector(*arg)
+        return function(self, arg)
+    return vector_arg_only
+
+
+class LegacyVector:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    @vector_argument
+    def __add__(self, other):
+        return LegacyVector(self.x + other.x, self.y + other.y)
+
+    @vector_argument
+    def __sub__(self, other):
+        return LegacyVector(self.x - other.x, self.y - other.y)
+
+    def __mul__(self, other):
+        return LegacyVector(self.x * other, self.y * other)
+
+    def __truediv__(self, other):
+        return LegacyVector(float(self.x) / other, float(self.y) / other)
+
+    @vector_argument
+    def __iadd__(self, other):
+        self.x += other.x
+        self.y += other.y
+        return self
+
+    def sqr_magnitude(self):
+        return self.x * self.x + self.y * self.y
+
+    def magnitude(self):
+        return np.sqrt(self.sqr_magnitude())
+
+    def normal(self):
+        return self / self.magnitude()
+
+    @vector_argument
+    def dot(self, other):
+        return self.x * other.x + self.y * other.y
+
+
+cases = {
+    "construct": "V(3.0, 4.0)",
+    "add vector": "a + b",
+    "add tuple": "a + (1.0, 2.0)",
+    "sub vector": "a - b",
+    "scale": "a * 2.5",
+    "iadd tuple": "c += (1.0, 2.0)",
+    "magnitude": "a.magnitude()",
+    "normal": "a.normal()",
+    "dot": "a.dot(b)",
+}
+
+
+def ops_per_second(statement, vector_type, number):
+    setup = "a = V(3.0, 4.0); b = V(1.0, -2.0); c = V(0.0, 0.0)"
+    best = min(timeit.repeat(statement, setup, globals={"V": vector_type},
+                             number=number, repeat=5))
+    return number / best
+
+
+def bulk_ops_per_second(count, number):
+    vectors = [Vector(i * .5, -i * .25) for i in range(count)]
+    packed = Vec2Array(vectors)
+
+    def scalar():
+        return [(v - (1.0, 1.0)).normal() for v in vectors]
+
+    def vectorized():
+        return (packed - (1.0, 1.0)).normal()
+
+    scalar_time = min(timeit.repeat(scalar, number=number, repeat=5))
+    packed_time = min(timeit.repeat(vectorized, number=number, repeat=5))
+    return count * number / scalar_time, count * number / packed_time
+
+
+def main(number=200000):
+    print(f"{'operation':<12} {'before':>14} {'after':>14} {'speedup':>8}")
+    for name, statement in cases.items():
+        before = ops_per_second(statement, LegacyVector, number)
+        after = ops_per_second(statement, Vector, number)
+        print(f"{name:<12} {before:>14,.0f} {after:>14,.0f} {after / before:>7.2f}x")
+
+    print()
+    print(f"{'count':<12} {'Vector':>14} {'Vec2Array':>14} {'speedup':>8}")
+    for count in (10, 100, 1000, 10000):
+        scalar, packed = bulk_ops_per_second(count, max(1, 100000 // count))
+        print(f"{count:<12} {scalar:>14,.0f} {packed:>14,.0f} {packed / scalar:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ from game_object import GameObject
 from physics import RigidBody, KinematicBody, CircleCollider, normalized_direction
 from debug_sprites import CircleSprite, colors
 from obstacles import Destructible
+from pools import ObjectPool
 import layers
 
 
@@ -25,17 +26,20 @@ class PlacedBomb(GameObject):
 
 
 def bomb_mounted(self):
+    #  The bomb may have fallen asleep on top of another sleeping body, and
+    #  pairs of sleeping bodies are skipped
     def enable_collide():
         self.body.disable_collide = False
+        self.body.wake()
 
-    self.game.add_timer(1, enable_collide)
-    self.game.add_timer(self.delay, self.kill)
+    self.game.add_timer(1, enable_collide, owner=self)
+    self.game.add_timer(self.delay, self.kill, owner=self)
 
 
 def bomb_explode(self):
-    self.game.add(Explosion(radius=self.blast_radius,
-                            damage=self.damage,
-                            position=self.body.collider.center()))
+    self.game.add(explosion_pool.acquire(radius=self.blast_radius,
+                                         damage=self.damage,
+                                         position=self.body.collider.center()))
 
 
 class Explosion(GameObject):
@@ -49,12 +53,28 @@ class Explosion(GameObject):
 
         self.layer = layers.EXPLOSIONS
 
+        self.on_mount += explosion_mount
         self.on_update += explosion_update
         self.on_collide += explosion_collide
 
         self.remaining_ticks = 2
         self.damage = damage
 
+    def reset(self, *, radius, damage, position):
+        super().reset()
+        self.body.reset(radius=radius, position=position, velocity=(0, 0))
+        self.sprite.reset(colors.LIGHT_GRAY, radius)
+
+        self.remaining_ticks = 2
+        self.damage = damage
+
+
+explosion_pool = ObjectPool(Explosion)
+
+
+def explosion_mount(self):
+    self.game.wake_bodies(self.body.collider.center(), self.body.collider.radius * 2)
+
 
 def explosion_collide(self, other):
     if self.remaining_ticks == 1:
@@ -0,0 +1,111 @@
+from globals import TILE_SIZE
+import layers
+
+
+class BroadphaseEntry:
+    def __init__(self, obj, order, cells):
+        self.obj = obj
+        self.order = order
+        self.cells = cells
+        self.layer_bit = 1 << obj.layer
+        self.mask = layers.masks[obj.layer]
+
+
+class SpatialHash:
+    def __init__(self, cell_size=TILE_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.entries = {}
+        self.order = 0
+
+    def cell_range(self, collider):
+        top_left = collider.top_left()
+        bottom_right = collider.bottom_right()
+        return (int(top_left.x // self.cell_size), int(top_left.y // self.cell_size),
+                int(bottom_right.x // self.cell_size), int(bottom_right.y // self.cell_size))
+
+    def insert(self, obj):
+        collider = obj.body.collider
+        entry = BroadphaseEntry(obj, self.order, self.cell_range(collider))
+        self.order += 1
+        self.entries[collider] = entry
+        collider.broadphase = self
+        self._link(entry)
+
+    def remove(self, obj):
+        collider = obj.body.collider
+        entry = self.entries.pop(collider, None)
+        if entry is None:
+            return
+        collider.broadphase = None
+        self._unlink(entry)
+
+    def update(self, collider):
+        entry = self.entries[collider]
+        cells = self.cell_range(collider)
+        if cells != entry.cells:
+            self._unlink(entry)
+            entry.cells = cells
+            self._link(entry)
+
+    def clear(self):
+        for collider in self.entries:
+            collider.broadphase = None
+        self.cells.clear()
+        self.entries.clear()
+
+    def query(self, top_left, bottom_right):
+        cells = (int(top_left.x // self.cell_size), int(top_left.y // self.cell_size),
+                 int(bottom_right.x // self.cell_size), int(bottom_right.y // self.cell_size))
+        found = {}
+        for key in self._keys(cells):
+            for order, entry in self.cells.get(key, {}).items():
+                found[order] = entry.obj
+        return list(found.values())
+
+    def _keys(self, cells):
+        x0, y0, x1, y1 = cells
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                yield (x, y)
+
+    def _link(self, entry):
+        for key in self._keys(entry.cells):
+            bucket = self.cells.get(key)
+            if bucket is None:
+                bucket = self.cells[key] = {}
+            bucket[entry.order] = entry
+
+    def _unlink(self, entry):
+        for key in self._keys(entry.cells):
+            bucket = self.cells[key]
+            del bucket[entry.order]
+            if not bucket:
+                del self.cells[key]
+
+    #  Layer compatible pairs sharing a cell, ordered by when the objects were
+    #  inserted so the result does not depend on cell iteration order
+    def pairs(self):
+        seen = set()
+        result = []
+
+        for bucket in self.cells.values():
+            if len(bucket) < 2:
+                continue
+            entries = list(bucket.values())
+            for i, a in enumerate(entries):
+                for b in entries[i + 1:]:
+                    if a.order > b.order:
+                        first, second = b, a
+                    else:
+                        first, second = a, b
+                    if not first.mask & second.layer_bit:
+                        continue
+                    key = (first.order, second.order)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    result.append((key, first.obj, second.obj))
+
+        result.sort(key=lambda pair: pair[0])
+        return [(obj, other) for _, obj, other in result]
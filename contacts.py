@@ -0,0 +1,114 @@
+from physics import Vector, KinematicBody, collision_manifold
+
+
+class Contact:
+    def __init__(self, a, b):
+        self.a = a
+        self.b = b
+        self.normal = None
+        self.penetration = 0
+        self.normal_impulse = 0
+        self.mass = 0
+        self.target_velocity = 0
+
+
+#  Contacts are cached by body pair, so a pair that is still touching on the
+#  next frame starts from the impulse that held it apart on this one
+class ContactSolver:
+    def __init__(self, *, iterations=4, restitution=.2, correction=.1):
+        self.iterations = iterations
+        self.restitution = restitution
+        self.correction = correction
+        self.contacts = {}
+        self.previous = {}
+
+    def begin(self):
+        self.previous = self.contacts
+        self.contacts = {}
+
+    def clear(self):
+        self.previous = {}
+        self.contacts = {}
+
+    def add(self, a, b, manifold=None):
+        if (type(a) is KinematicBody or type(b) is KinematicBody
+           or a.disable_collide or b.disable_collide):
+            return
+
+        contact = self.previous.pop((a, b), None)
+        if contact is None:
+            contact = self.previous.pop((b, a), None)
+            if contact is None:
+                contact = Contact(a, b)
+            else:
+                contact.a, contact.b = a, b
+                if contact.normal is not None:
+                    contact.normal = -contact.normal
+
+        normal, contact.penetration = manifold if manifold is not None \
+            else collision_manifold(a, b)
+        #  Coincident centers have a zero normal. Keep separating them the way
+        #  the pair was pushed last frame, or straight up
+        if not (normal.x or normal.y):
+            normal = contact.normal if contact.normal is not None else Vector(0, -1)
+        contact.normal = normal
+        self.contacts[(a, b)] = contact
+
+    def solve(self):
+        contacts = []
+        for contact in self.contacts.values():
+            inverse_mass_a = inverse_mass(contact.a)
+            inverse_mass_b = inverse_mass(contact.b)
+            if inverse_mass_a + inverse_mass_b == 0:
+                continue
+            contact.inverse_mass_a = inverse_mass_a
+            contact.inverse_mass_b = inverse_mass_b
+            contact.mass = 1 / (inverse_mass_a + inverse_mass_b)
+
+            approach = (contact.a.velocity - contact.b.velocity).dot(contact.normal)
+            contact.target_velocity = -self.restitution * approach if approach < 0 else 0
+
+            if contact.normal_impulse:
+                apply_impulse(contact, contact.normal_impulse)
+            contacts.append(contact)
+
+        for i in range(self.iterations):
+            for contact in contacts:
+                approach = (contact.a.velocity - contact.b.velocity).dot(contact.normal)
+                impulse = contact.mass * (contact.target_velocity - approach)
+                total = max(contact.normal_impulse + impulse, 0)
+                impulse = total - contact.normal_impulse
+                contact.normal_impulse = total
+                if impulse:
+                    apply_impulse(contact, impulse)
+
+        #  Penetration is worked off a fraction per iteration as well, tracking
+        #  how far each body has already been pushed in this step
+        shifts = {}
+        for i in range(self.iterations):
+            for contact in contacts:
+                shift_a = shifts.setdefault(contact.a, Vector(0, 0))
+                shift_b = shifts.setdefault(contact.b, Vector(0, 0))
+                remaining = contact.penetration - (shift_a - shift_b).dot(contact.normal)
+                if remaining <= 0:
+                    continue
+                correction = remaining * contact.mass * self.correction * contact.normal
+                shift_a.add_scaled(correction, contact.inverse_mass_a)
+                shift_b.add_scaled(correction, -contact.inverse_mass_b)
+
+        for body, shift in shifts.items():
+            if shift.x or shift.y:
+                body.collider.move(shift)
+
+
+#  Sleeping bodies hold still like static ones until something wakes them
+def inverse_mass(body):
+    return 0 if body.sleeping else body.inverse_mass
+
+
+def apply_impulse(contact, magnitude):
+    impulse = magnitude * contact.normal
+    if contact.inverse_mass_a:
+        contact.a.velocity += contact.inverse_mass_a * impulse
+    if contact.inverse_mass_b:
+        contact.b.velocity -= contact.inverse_mass_b * impulse
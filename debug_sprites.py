@@ -16,23 +16,56 @@ class colors:
     TRANSPARENT = (255, 0, 255)  # purple can't be used
 
 
+#  Sprites with the same shape, size and color all share one surface. It is
+#  converted to the display pixel format once a display exists, which never
+#  happens for headless games
+surfaces = {}
+converted = set()
+
+
+def draw_rect(size, color):
+    image = pg.Surface(size)
+    image.fill(color)
+    return image
+
+
+def draw_circle(radius, color):
+    image = pg.Surface((radius * 2, radius * 2))
+    image.set_colorkey(colors.TRANSPARENT, pg.RLEACCEL)
+    image.fill(colors.TRANSPARENT)
+    pg.draw.circle(image, color, (radius, radius), radius)
+    return image
+
+
+shapes = {"rect": draw_rect, "circle": draw_circle}
+
+
+def cached_surface(shape, size, color):
+    key = (shape, size, color)
+    image = surfaces.get(key)
+    if image is None:
+        image = surfaces[key] = shapes[shape](size, color)
+    if key not in converted and pg.display.get_surface() is not None:
+        image = surfaces[key] = image.convert()
+        converted.add(key)
+    return image
+
+
 class RectSprite(pg.sprite.Sprite):
     def __init__(self, color, size):
         super().__init__()
-        size = (int(size[0]), int(size[1]))
-        self.image = pg.Surface(size)
-        self.image.fill(color)
+        self.reset(color, size)
 
+    def reset(self, color, size):
+        self.image = cached_surface("rect", (int(size[0]), int(size[1])), color)
         self.rect = self.image.get_rect()
 
 
 class CircleSprite(pg.sprite.Sprite):
     def __init__(self, color, radius):
         super().__init__()
-        radius = int(radius)
-        self.image = pg.Surface((radius * 2, radius * 2))
-        self.image.set_colorkey(colors.TRANSPARENT)
-        self.image.fill(colors.TRANSPARENT)
-        pg.draw.circle(self.image, color, (radius, radius), radius)
+        self.reset(color, radius)
 
+    def reset(self, color, radius):
+        self.image = cached_surface("circle", int(radius), color)
         self.rect = self.image.get_rect()
@@ -0,0 +1,175 @@
+import os
+import json
+import random
+import numpy as np
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from rooms import MapGenerator, DeadendRoom, distance
+from room_templates import door_mask
+
+ROOM_TYPES = ("normal", "boss", "shop", "gold")
+ROOM_COLORS = np.array([(255, 255, 255), (200, 30, 30), (40, 90, 220), (240, 200, 0)],
+                       dtype=np.uint8)
+
+#  Per room columns, concatenated over every floor of the batch. Floor i owns
+#  rows floor_offset[i]:floor_offset[i + 1]
+ROOM_COLUMNS = {
+    "room_x": np.int16,
+    "room_y": np.int16,
+    "room_type": np.uint8,
+    "room_deadend": np.bool_,
+    "room_distance": np.int16,
+    "room_doors": np.uint8
+}
+
+
+#  Runs in the worker processes, which only need the layout, so neither
+#  templates nor matplotlib are ever loaded there
+def generate_chunk(job):
+    seeds, amount, deadends = job
+    columns = {name: [] for name in ROOM_COLUMNS}
+    sizes = []
+    attempts = []
+    failed = []
+
+    for floor_seed in seeds:
+        random.seed(floor_seed)
+        generator = MapGenerator()
+        try:
+            attempts.append(generator.generate_layout(amount, deadends))
+        except ValueError:
+            failed.append(floor_seed)
+            continue
+
+        sizes.append(len(generator.rooms))
+        for room in generator.rooms:
+            columns["room_x"].append(room.position[0])
+            columns["room_y"].append(room.position[1])
+            columns["room_type"].append(ROOM_TYPES.index(room.type))
+            columns["room_deadend"].append(type(room) is DeadendRoom)
+            columns["room_distance"].append(distance(room.position))
+            columns["room_doors"].append(door_mask(generator.get_surrounding(room.position)))
+
+    failed_seeds = set(failed)
+    succeeded = [floor_seed for floor_seed in seeds if floor_seed not in failed_seeds]
+    return succeeded, sizes, attempts, failed, columns
+
+
+def generate_batch(floors, amount, deadends, *, first_seed=0, workers=None, chunk_size=500):
+    seeds = list(range(first_seed, first_seed + floors))
+    jobs = [(seeds[i:i + chunk_size], amount, deadends)
+            for i in range(0, len(seeds), chunk_size)]
+
+    floor_seeds, sizes, attempts, failed = [], [], [], []
+    columns = {name: [] for name in ROOM_COLUMNS}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk in pool.map(generate_chunk, jobs):
+            chunk_seeds, chunk_sizes, chunk_attempts, chunk_failed, chunk_columns = chunk
+            floor_seeds += chunk_seeds
+            sizes += chunk_sizes
+            attempts += chunk_attempts
+            failed += chunk_failed
+            for name in ROOM_COLUMNS:
+                columns[name] += chunk_columns[name]
+
+    records = {name: np.array(values, dtype=ROOM_COLUMNS[name])
+               for name, values in columns.items()}
+    records["floor_seed"] = np.array(floor_seeds, dtype=np.int64)
+    records["floor_offset"] = np.concatenate(([0], np.cumsum(sizes))).astype(np.int64)
+    records["floor_attempts"] = np.array(attempts, dtype=np.uint8)
+    records["failed_seed"] = np.array(failed, dtype=np.int64)
+    records["room_types"] = np.array(ROOM_TYPES)
+    return records
+
+
+def floor_slices(records):
+    offsets = records["floor_offset"]
+    return [slice(start, end) for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+
+#  Counts indexed by value: histogram[d] is how many samples equal d
+def histograms(records):
+    floors = floor_slices(records)
+    x, y = records["room_x"], records["room_y"]
+    distances = records["room_distance"]
+    boss = records["room_type"] == ROOM_TYPES.index("boss")
+
+    width = [int(x[floor].max() - x[floor].min() + 1) for floor in floors]
+    height = [int(y[floor].max() - y[floor].min() + 1) for floor in floors]
+
+    return {
+        "boss_distance": np.bincount(distances[boss]).tolist(),
+        "deadend_distance": np.bincount(distances[records["room_deadend"]]).tolist(),
+        "door_mask": np.bincount(records["room_doors"], minlength=16).tolist(),
+        "door_count": np.bincount([bin(mask).count("1")
+                                   for mask in records["room_doors"].tolist()],
+                                  minlength=5).tolist(),
+        "floor_width": np.bincount(width).tolist(),
+        "floor_height": np.bincount(height).tolist(),
+        "attempts": np.bincount(records["floor_attempts"]).tolist()
+    }
+
+
+def floor_image(records, floor, scale=6):
+    x = records["room_x"][floor].astype(int)
+    y = records["room_y"][floor].astype(int)
+    image = np.zeros((y.max() - y.min() + 3, x.max() - x.min() + 3, 3), dtype=np.uint8)
+    image[y - y.min() + 1, x - x.min() + 1] = ROOM_COLORS[records["room_type"][floor]]
+    return image.repeat(scale, axis=0).repeat(scale, axis=1)
+
+
+#  Only called on request, in the main process
+def save_thumbnails(records, directory, count):
+    import matplotlib.image
+
+    os.makedirs(directory, exist_ok=True)
+    for i, floor in enumerate(floor_slices(records)[:count]):
+        seed = records["floor_seed"][i]
+        matplotlib.image.imsave(os.path.join(directory, f"floor_{seed}.png"),
+                                floor_image(records, floor))
+
+
+def print_histogram(name, counts):
+    total = sum(counts)
+    print(name)
+    for value, count in enumerate(counts):
+        if count:
+            bar = "#" * max(1, round(40 * count / total))
+            print(f"  {value:>4} {count:>8} {bar}")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Generate floors in bulk and record their layouts")
+    parser.add_argument('floors', type=int, help="Number of floors to generate")
+    parser.add_argument('--rooms', type=int, default=10, help="Rooms per floor")
+    parser.add_argument('--deadends', type=int, default=4, help="Dead ends per floor")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="Seed of the first floor, the others use the following seeds")
+    parser.add_argument('--workers', type=int, help="Worker processes, one per CPU by default")
+    parser.add_argument('-o', '--output', default="floors.npz",
+                        help="Where to write the per floor records")
+    parser.add_argument('--thumbnails', metavar="DIRECTORY",
+                        help="Also write a PNG of the first floors to this directory")
+    parser.add_argument('--thumbnail-count', type=int, default=16,
+                        help="How many floors get a thumbnail")
+
+    args = parser.parse_args()
+
+    start = perf_counter()
+    records = generate_batch(args.floors, args.rooms, args.deadends,
+                             first_seed=args.seed, workers=args.workers)
+    elapsed = perf_counter() - start
+    print(f"{len(records['floor_seed'])} floors in {elapsed:.2f}s, "
+          f"{len(records['failed_seed'])} failed")
+
+    np.savez_compressed(args.output, **records)
+
+    summary = histograms(records)
+    with open(os.path.splitext(args.output)[0] + ".summary.json", 'w') as file:
+        json.dump(summary, file, indent=1)
+    for name, counts in summary.items():
+        print_histogram(name, counts)
+
+    if args.thumbnails is not None:
+        save_thumbnails(records, args.thumbnails, args.thumbnail_count)
@@ -1,54 +1,93 @@
 import pygame as pg
+import numpy as np
 from sys import exit
 from player import Player
-from debug_sprites import colors
-from physics import Vector, resolveCollision
+from physics import Vector, PhysicsWorld, CircleCollider
+from physics import wake_on_contact, sweep_circle
+from contacts import ContactSolver
 from globals import TILE_SIZE, WALL_SIZE
 from globals import ROOM_WIDTH, ROOM_HEIGHT
 from game_object import Event
+from broadphase import SpatialHash
+from static_geometry import StaticGeometry
+from simulation import WallClock, SimulationClock, VirtualKeys
+from timers import Scheduler
+from renderer import DirtyRenderer
+from profiler import PhaseProfiler
+from itertools import chain
 import rooms
 import layers
 import ui
 import assets
 from random import seed, choice
 from argparse import ArgumentParser
+from time import perf_counter
 
 pg.init()
 
+BATCH_NARROWPHASE_PAIRS = 32
+CONTACT_SLOP = .01
 
+
+#  Drawn by DirtyRenderer, which moves every sprite by the group's offset
 class OffsetedSpriteGroup(pg.sprite.Group):
     def __init__(self, *args, offset, **kwargs):
         super().__init__(*args, **kwargs)
         self.offset = offset
 
-    def draw(self, surface):
-        sprites = self.sprites()
-        surface_blit = surface.blit
-        for spr in sprites:
-            self.spritedict[spr] = surface_blit(spr.image, spr.rect.move(*self.offset))
-        self.lostsprites = []
-
 
 class Game:
-    def __init__(self, *, game_seed=None):
+    def __init__(self, *, game_seed=None, brute_force_collisions=False,
+                 fixed_timestep=None, max_steps=5, solver_iterations=4, headless=False,
+                 dirty_rendering=True, debug=False):
 
         self.size = (self.width, self.height) = (
             ROOM_WIDTH * TILE_SIZE,
             ROOM_HEIGHT * TILE_SIZE
         )
-        self.screen = pg.display.set_mode((self.width + 2 * WALL_SIZE,
-                                           self.height + 2 * WALL_SIZE))
+        self.headless = headless
+        self.debug = debug
+        self.profiler = PhaseProfiler()
+        if headless:
+            self.screen = None
+            self.renderer = None
+            self.clock = SimulationClock()
+            self.keys = VirtualKeys()
+        else:
+            self.screen = pg.display.set_mode((self.width + 2 * WALL_SIZE,
+                                               self.height + 2 * WALL_SIZE))
+            self.renderer = DirtyRenderer(self.screen, profiler=self.profiler)
+            self.clock = WallClock()
         if game_seed is not None:
             seed(game_seed)
 
-        self.clock = pg.time.Clock()
+        self.dirty_rendering = dirty_rendering
+
+        self.fixed_timestep = fixed_timestep
+        self.max_steps = max_steps
+        self.accumulator = 0
+        self.simulation_time = 0
 
         self.objects = []
+        self.spawn_queue = []
+        self.despawn_queue = []
+        self.ticking = False
+        self.layer_objects = {layer: {} for layer in layers.all_layers}
+        self.continuous_objects = {}
+        self.tagged_objects = {}
+        self.typed_objects = {}
         self.ui_objects = {}
         self.sprites = OffsetedSpriteGroup(offset=(WALL_SIZE, WALL_SIZE))
+        self.static_sprites = {}
+        self.background_dirty = False
+
+        self.physics = PhysicsWorld()
+        self.broadphase = SpatialHash()
+        self.static_geometry = StaticGeometry()
+        self.contact_solver = ContactSolver(iterations=solver_iterations)
+        self.brute_force_collisions = brute_force_collisions
 
-        self.timers = {}
-        self.timer_index = 0
+        self.timers = Scheduler()
 
         self.floor_generator = rooms.MapGenerator()
         self.floor_generator.generate_map(10, 4)
@@ -59,63 +98,223 @@ class Game:
 
         self.on_room_complete = Event("room_complete")
         self.on_room_complete += complete_room
+        self.on_quit = Event("quit")
 
         self.load_room(position=(0, 0))
 
         self.add_ui(ui.PlayerPickups(position=(10, 40)))
+        self.add_ui(ui.ProfilerOverlay(position=(self.width + WALL_SIZE - 190, WALL_SIZE + 10)))
 
     def run(self):
         while True:
-            for event in pg.event.get():
-                if event.type == pg.QUIT:
-                    exit()
-                if event.type == pg.KEYDOWN:
-                    if event.key == pg.K_f:
-                        self.player.body.collider.move_to(self.room_center())
-
-            delta_time = self.clock.get_time() / 1000
-
-            for i, obj in enumerate(self.objects):
-                obj.physics_update(delta_time)
-                obj.update(delta_time)
-
-                if obj.to_kill:
-                    self.remove(i)
-
-            self.compute_collisions(delta_time)
-
-            current_time = self.get_time()
-            to_remove = []
+            self.frame()
 
-            for id, (time, function, args) in self.timers.items():
-                if time <= current_time:
-                    result = function(*args)
-                    if not result:
-                        to_remove.append(id)
+    def step(self, frames=1):
+        for i in range(frames):
+            self.frame()
 
-            for id in to_remove:
-                self.remove_timer(id)
+    def frame(self):
+        profiler = self.profiler
+        profiler.begin_frame()
 
-            self.screen.fill(colors.WHITE)
+        if not self.headless:
+            self.handle_events()
+        profiler.mark("input")
 
-            self.sprites.update(delta_time)
-            self.sprites.draw(self.screen)
+        frame_time = self.clock.get_time() / 1000
 
-            for name, element in self.ui_objects.items():
-                self.screen.blit(element.get_render(), element.position)
-
-            pg.display.flip()
-
-            self.clock.tick(60)
+        if self.fixed_timestep is None:
+            self.simulate(frame_time)
+        else:
+            self.accumulator += frame_time
+            steps = 0
+            while self.accumulator >= self.fixed_timestep and steps < self.max_steps:
+                self.simulate(self.fixed_timestep)
+                self.accumulator -= self.fixed_timestep
+                steps += 1
+            if self.accumulator >= self.fixed_timestep:
+                self.accumulator %= self.fixed_timestep
+            if not self.headless:
+                self.interpolate_sprites(self.accumulator / self.fixed_timestep)
+
+        if not self.headless:
+            self.render(frame_time)
+
+        self.clock.tick(60)
+        profiler.mark("wait")
+        profiler.end_frame()
+
+    def handle_events(self):
+        for event in pg.event.get():
+            if event.type == pg.QUIT:
+                self.on_quit.dispatch(self)
+                exit()
+            if event.type == pg.KEYDOWN:
+                if event.key == pg.K_f:
+                    self.player.body.collider.move_to(self.room_center())
+            if event.type == pg.WINDOWEXPOSED:
+                self.renderer.invalidate()
+
+    #  Objects spawned or killed while ticking are queued and only join or
+    #  leave self.objects after the update phase and at the end of the tick
+    def simulate(self, delta_time):
+        profiler = self.profiler
+        self.ticking = True
+        self.simulation_time += delta_time
+
+        self.physics.step(delta_time)
+        self.sweep_continuous()
+        profiler.mark("physics")
 
-    def compute_collisions(self, delta_time):
-        for i, obj in enumerate(self.objects):
-            for other in self.objects[i + 1:]:
-                if layers.collisions[obj.layer][other.layer]:
-                    if obj.body.collider.is_colliding(other.body.collider):
-                        obj.collide(other)
-                        other.collide(obj)
-                        resolveCollision(obj.body, other.body, delta_time)
+        for obj in self.objects:
+            obj.physics_update(delta_time)
+            obj.update(delta_time)
+        profiler.mark("update")
+
+        self.apply_queues()
+        profiler.mark("spawn")
+
+        self.compute_collisions()
+        profiler.mark("collisions")
+
+        self.timers.run(self.get_time())
+        profiler.mark("timers")
+
+        self.apply_queues()
+        profiler.mark("spawn")
+
+        self.ticking = False
+
+    def apply_queues(self):
+        while self.despawn_queue or self.spawn_queue:
+            despawn, self.despawn_queue = self.despawn_queue, []
+            for obj in despawn:
+                if obj.game_index is not None:
+                    self.remove(obj)
+
+            spawn, self.spawn_queue = self.spawn_queue, []
+            for obj in spawn:
+                self.add_now(obj)
+
+    #  Pulls fast circle bodies back to their earliest impact along this step's
+    #  motion, so the regular collision pass sees hits they would tunnel through
+    def sweep_continuous(self):
+        world = self.physics
+        for obj in self.continuous_objects:
+            collider = obj.body.collider
+            if obj.body.world is not world or type(collider) is not CircleCollider:
+                continue
+            start = Vector(*world.previous_position[obj.body.index].tolist())
+            motion = collider.center() - start
+            if not motion.x and not motion.y:
+                continue
+
+            radius = collider.radius
+            top_left = Vector(min(start.x, start.x + motion.x) - radius,
+                              min(start.y, start.y + motion.y) - radius)
+            bottom_right = Vector(max(start.x, start.x + motion.x) + radius,
+                                  max(start.y, start.y + motion.y) + radius)
+            mask = layers.masks[obj.layer]
+
+            earliest = None
+            for other in chain(self.broadphase.query(top_left, bottom_right),
+                               self.static_geometry.query(top_left, bottom_right)):
+                if other is obj or not mask >> other.layer & 1:
+                    continue
+                t = sweep_circle(start, radius, motion, other.body.collider)
+                if t is not None and (earliest is None or t < earliest):
+                    earliest = t
+
+            if earliest is not None and earliest < 1:
+                impact = start + motion * earliest + motion.normal() * CONTACT_SLOP
+                collider.move(impact - collider.center())
+
+    def interpolate_sprites(self, alpha):
+        world = self.physics
+        count = world.count
+        offsets = (world.previous_position[:count] - world.position[:count]) * (1 - alpha)
+        for obj in self.objects:
+            if obj.sprite is not None and obj.body.world is world:
+                obj.sync_sprite(offsets[obj.body.index].tolist())
+
+    def render(self, delta_time):
+        if self.background_dirty:
+            self.build_background()
+        if not self.dirty_rendering:
+            self.renderer.invalidate()
+        self.profiler.mark("background")
+
+        self.sprites.update(delta_time)
+        self.renderer.draw(self.sprites,
+                           [element for element in self.ui_objects.values() if element.enabled])
+
+    #  Static objects are not part of self.sprites. They are drawn into the
+    #  background once per room, and again only after one of them changes
+    def build_background(self):
+        offset = self.sprites.offset
+        layers = []
+        for obj in self.static_sprites:
+            obj.sync_sprite()
+            layers.append((obj.sprite.image, obj.sprite.rect.move(*offset)))
+        self.renderer.draw_background(layers)
+        self.background_dirty = False
+
+    #  (obj, other, manifold) for every touching pair. The manifold is None when
+    #  it was not computed yet
+    def find_contacts(self):
+        if self.brute_force_collisions:
+            return self.narrowphase(self.brute_force_pairs())
+        pairs = [(obj, other) for obj, other in self.broadphase.pairs()
+                 if not (obj.body.sleeping and other.body.sleeping)]
+        if len(pairs) >= BATCH_NARROWPHASE_PAIRS:
+            contacts = self.batch_narrowphase(pairs)
+        else:
+            contacts = self.narrowphase(pairs)
+        dynamic = [obj for obj in self.objects
+                   if not obj.static and not obj.body.sleeping]
+        return chain(contacts, ((obj, static, None) for obj, static
+                                in self.static_geometry.contacts(dynamic)))
+
+    def compute_collisions(self):
+        contacts = self.find_contacts()
+
+        self.contact_solver.begin()
+
+        room = self.current_room
+        for obj, other, manifold in contacts:
+            if self.current_room is not room:
+                return
+            wake_on_contact(obj.body, other.body)
+            obj.collide(other)
+            other.collide(obj)
+            self.contact_solver.add(obj.body, other.body, manifold)
+
+        self.contact_solver.solve()
+
+    def narrowphase(self, pairs):
+        for obj, other in pairs:
+            if obj.body.collider.is_colliding(other.body.collider):
+                yield obj, other, None
+
+    def batch_narrowphase(self, pairs):
+        a = np.fromiter((obj.body.index for obj, _ in pairs), int, len(pairs))
+        b = np.fromiter((other.body.index for _, other in pairs), int, len(pairs))
+        hit, normal, penetration = self.physics.narrowphase(a, b)
+        for i in np.flatnonzero(hit).tolist():
+            obj, other = pairs[i]
+            yield obj, other, (Vector(*normal[i].tolist()), penetration[i].item())
+
+    def brute_force_pairs(self):
+        for layer, other_layer in layers.interacting_pairs:
+            bucket = list(self.layer_objects[layer])
+            if layer == other_layer:
+                for i, obj in enumerate(bucket):
+                    for other in bucket[i + 1:]:
+                        yield obj, other
+            else:
+                for obj in bucket:
+                    for other in list(self.layer_objects[other_layer]):
+                        yield obj, other
 
     def load_room(self, *, position=None, direction=None):
         player_pos = None
@@ -137,7 +336,9 @@ class Game:
 
         self.player.body.collider.move_to(player_pos)
 
-        self.add(self.player)
+        self.current_room.populate()
+
+        self.add(self.player, loading_room=True)
 
         self.obstacle_grid = [[None for j in range(ROOM_WIDTH)]
                               for i in range(ROOM_HEIGHT)]
@@ -151,28 +352,78 @@ class Game:
         else:
             self.room_completed = True
 
+        if self.renderer is not None:
+            self.build_background()
+
+        self.floor_generator.prefetch(self.current_room)
+
     def exit_room(self):
         if self.room_completed:
             self.current_room.objects = [obj for obj in self.objects
                                          if type(obj) is not Player and
+                                         not obj.to_kill and
                                          obj.layer != layers.PLAYER_TEARS and
                                          obj.layer != layers.ENEMY_TEARS]
 
+        for obj in self.objects:
+            if obj is not self.player:
+                self.cancel_timers(obj)
+
+        for obj in self.objects:
+            obj.game_index = None
+
         self.sprites.empty()
+        self.static_sprites.clear()
+        self.broadphase.clear()
+        self.static_geometry.clear()
+        self.contact_solver.clear()
+        self.physics.clear()
         self.objects.clear()
+        self.spawn_queue.clear()
+        self.despawn_queue.clear()
+        for bucket in self.layer_objects.values():
+            bucket.clear()
+        self.continuous_objects.clear()
+        self.tagged_objects.clear()
+        self.typed_objects.clear()
         self.enemy_count = 0
 
     def room_center(self):
         return Vector(self.width / 2, self.height / 2)
 
     def add(self, obj, *, loading_room=False):
+        if self.ticking and not loading_room:
+            self.spawn_queue.append(obj)
+        else:
+            self.add_now(obj)
+
+    def add_now(self, obj):
         obj.game = self
 
         obj.on_mount.dispatch(obj)
 
+        obj.game_index = len(self.objects)
         self.objects.append(obj)
+        self.layer_objects[obj.layer][obj] = None
+        if obj.body.continuous:
+            self.continuous_objects[obj] = None
+        for tag in obj.tags:
+            self.tagged_objects.setdefault(tag, {})[obj] = None
+        for cls in type(obj).__mro__[:-1]:
+            self.typed_objects.setdefault(cls, {})[obj] = None
+        self.physics.add(obj.body)
+        if obj.static:
+            self.static_geometry.add(obj)
+        else:
+            self.broadphase.insert(obj)
         if obj.sprite is not None:
-            self.sprites.add(obj.sprite)
+            if obj.body is not None:
+                obj.sync_sprite()
+            if obj.static:
+                self.static_sprites[obj] = None
+                self.background_dirty = True
+            else:
+                self.sprites.add(obj.sprite)
 
         if obj.layer == layers.OBSTACLES and not isinstance(obj, rooms.Barrier):
             pos = obj.body.collider.center() / TILE_SIZE
@@ -181,34 +432,94 @@ class Game:
         elif obj.layer == layers.ENEMIES:
             self.enemy_count += 1
 
-    def remove(self, index):
-        obj = self.objects.pop(index)
+    def despawn(self, obj):
+        self.despawn_queue.append(obj)
+
+    def remove(self, obj):
+        last = self.objects.pop()
+        if last is not obj:
+            self.objects[obj.game_index] = last
+            last.game_index = obj.game_index
+        obj.game_index = None
+
+        del self.layer_objects[obj.layer][obj]
+        self.continuous_objects.pop(obj, None)
+        for tag in obj.tags:
+            self.tagged_objects.get(tag, {}).pop(obj, None)
+        for cls in type(obj).__mro__[:-1]:
+            del self.typed_objects[cls][obj]
+        if obj.static:
+            self.static_geometry.remove(obj)
+        else:
+            self.broadphase.remove(obj)
+        self.physics.remove(obj.body)
         if obj.sprite is not None:
-            self.sprites.remove(obj.sprite)
+            if obj.static:
+                del self.static_sprites[obj]
+                self.background_dirty = True
+            else:
+                self.sprites.remove(obj.sprite)
         if obj.layer == layers.OBSTACLES:
             pos = obj.body.collider.center() / TILE_SIZE
             x, y = int(pos.x), int(pos.y)
             if self.obstacle_grid[y][x] is obj:
                 self.obstacle_grid[y][x] = None
+        if obj.pool is not None:
+            obj.pool.release(obj)
 
+    #  With a fixed timestep, timers run on simulated time so every catch up
+    #  step sees its own time and firing does not depend on frame timing
     def get_time(self):
-        return pg.time.get_ticks() / 1000
+        if self.fixed_timestep is not None:
+            return self.simulation_time
+        return self.clock.get_ticks() / 1000
+
+    def get_pressed(self):
+        if self.headless:
+            return self.keys
+        return pg.key.get_pressed()
+
+    def add_timer(self, time, function, args=(), *, repeat=False, owner=None):
+        return self.timers.add(self.get_time() + time, function, args,
+                               interval=time if repeat else None, owner=owner)
+
+    def remove_timer(self, timer):
+        self.timers.remove(timer)
+
+    def cancel_timers(self, owner):
+        self.timers.cancel_owner(owner)
+
+    def wake_bodies(self, center, radius):
+        offset = Vector(radius, radius)
+        for obj in self.broadphase.query(center - offset, center + offset):
+            if (obj.body.collider.center() - center).sqr_magnitude() <= radius * radius:
+                obj.body.wake()
+
+    #  Objects in the room are indexed by each of their tags and by every class
+    #  they are an instance of, so these lookups only touch the results. Tags
+    #  changed on obj.tags directly, rather than through add_tag and
+    #  remove_tag, are only picked up the next time the object is added
+    def find_object(self, tag):
+        for obj in self.tagged_objects.get(tag, ()):
+            return obj
 
-    def add_timer(self, time, function, args=()):
-        self.timers[self.timer_index] = (self.get_time() + time, function, args)
-        self.timer_index += 1
-        return self.timer_index - 1
+    def find_objects(self, tag):
+        return list(self.tagged_objects.get(tag, ()))
 
-    def remove_timer(self, id):
-        del self.timers[id]
+    def find_instances(self, cls):
+        return list(self.typed_objects.get(cls, ()))
 
-    def find_object(self, tag):
-        for obj in self.objects:
-            if tag in obj.tags:
-                return obj
+    def add_tag(self, obj, tag):
+        if tag not in obj.tags:
+            obj.tags.append(tag)
+            if obj.game_index is not None:
+                self.tagged_objects.setdefault(tag, {})[obj] = None
 
-    def find_objects(self, tag):
-        return [obj for obj in self.objects if tag in obj.tags]
+    def remove_tag(self, obj, tag):
+        if tag in obj.tags:
+            obj.tags.remove(tag)
+            if obj.game_index is not None:
+                self.tagged_objects.get(tag, {}).pop(obj, None)
 
     def enemy_died(self):
         self.enemy_count -= 1
@@ -216,14 +527,14 @@ class Game:
             self.on_room_complete.dispatch(self)
 
     def close_doors(self):
-        for obj in self.objects:
-            if type(obj) is rooms.Door:
-                obj.enabled = False
+        for door in self.typed_objects.get(rooms.Door, ()):
+            door.set_enabled(False)
+        self.background_dirty = True
 
     def open_doors(self):
-        for obj in self.objects:
-            if type(obj) is rooms.Door:
-                obj.enabled = True
+        for door in self.typed_objects.get(rooms.Door, ()):
+            door.set_enabled(True)
+        self.background_dirty = True
 
     def add_ui(self, element):
         self.ui_objects[element.name] = element
@@ -239,12 +550,53 @@ def complete_room(self):
 if __name__ == "__main__":
     parser = ArgumentParser(description="Binding of Isaac clone")
     parser.add_argument('-s', help="Game seed")
+    parser.add_argument('--brute-force', action="store_true",
+                        help="Test every object pair instead of using the spatial hash")
+    parser.add_argument('--tick-rate', type=float,
+                        help="Simulate at a fixed rate in Hz, independent of the frame rate")
+    parser.add_argument('--max-steps', type=int, default=5,
+                        help="Most simulation steps run to catch up in a single frame")
+    parser.add_argument('--solver-iterations', type=int, default=4,
+                        help="Contact solver iterations per simulation step")
+    parser.add_argument('--full-redraw', action="store_true",
+                        help="Redraw the whole screen every frame instead of only what changed")
+    parser.add_argument('--debug', action="store_true",
+                        help="Show frame phase timings on screen")
+    parser.add_argument('--profile-csv', metavar="PATH",
+                        help="Write the timings of the last frames as CSV on exit")
+    parser.add_argument('--profile-trace', metavar="PATH",
+                        help="Write the timings of the last frames as a Chrome trace on exit")
+    parser.add_argument('--headless', type=int, metavar="FRAMES",
+                        help="Simulate this many frames without a window and report the speed")
 
     args = parser.parse_args()
 
-    options = {}
+    options = {"brute_force_collisions": args.brute_force,
+               "max_steps": args.max_steps,
+               "solver_iterations": args.solver_iterations,
+               "dirty_rendering": not args.full_redraw,
+               "debug": args.debug}
 
-    if args.s is not None:
-        options["seed"] = hash(args.s)
+    if args.tick_rate is not None:
+        options["fixed_timestep"] = 1 / args.tick_rate
 
-    Game(**options).run()
+    if args.s is not None:
+        options["game_seed"] = hash(args.s)
+
+    def export_profile(game):
+        if args.profile_csv is not None:
+            game.profiler.export_csv(args.profile_csv)
+        if args.profile_trace is not None:
+            game.profiler.export_chrome_trace(args.profile_trace)
+
+    if args.headless is None:
+        game = Game(**options)
+        game.on_quit += export_profile
+        game.run()
+    else:
+        game = Game(headless=True, **options)
+        start = perf_counter()
+        game.step(args.headless)
+        elapsed = perf_counter() - start
+        print(f"{args.headless} frames in {elapsed:.2f}s ({args.headless / elapsed:.0f} frames/s)")
+        export_profile(game)
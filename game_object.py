@@ -1,10 +1,13 @@
-from collections import OrderedDict
-
-
 class GameObject:
+    static = False
+    pool = None
+    default_handlers = None
+
     def __new__(cls, *args, **kwargs):
         instance = super().__new__(cls)
         instance.to_kill = False
+        instance.game = None
+        instance.game_index = None
         instance.body = None
         instance.sprite = None
         instance.layer = None
@@ -16,24 +19,48 @@ class GameObject:
         instance.on_kill = Event("kill")
         return instance
 
+    #  Pools call this once on a freshly built object, so reset() can put back
+    #  the handlers and tags it had then
+    def save_defaults(self):
+        self.default_handlers = {name: dict(value.handlers) for name, value in vars(self).items()
+                                 if isinstance(value, Event)}
+        self.default_tags = list(self.tags)
+
+    #  Called on pooled objects before they are spawned again. Handlers and tags
+    #  added during the previous life are dropped, subclasses reinitialize their
+    #  own state and keep the body and sprite
+    def reset(self):
+        self.to_kill = False
+        self.game = None
+        self.game_index = None
+        if self.default_handlers is not None:
+            for name, handlers in self.default_handlers.items():
+                getattr(self, name).reset(handlers)
+            self.tags = list(self.default_tags)
+
     def physics_update(self, delta_time):
         if self.sprite is not None:
-            if self.body is not None:
-                point = self.sprite_top_left()
-                self.sprite.rect.x = int(point.x)
-                self.sprite.rect.y = int(point.y)
+            if self.body is not None and not self.body.sleeping:
+                self.sync_sprite()
 
-        if self.body is not None:
+        if self.body is not None and self.body.world is None:
             self.body.update(delta_time)
 
-        self.on_physics_update.dispatch(self, delta_time)
+        for handler in self.on_physics_update.callbacks:
+            handler(self, delta_time)
+
+    def sync_sprite(self, offset=(0, 0)):
+        point = self.sprite_top_left()
+        self.sprite.rect.x = int(point.x + offset[0])
+        self.sprite.rect.y = int(point.y + offset[1])
 
     def sprite_top_left(self):
         return self.body.collider.top_left()
 
     def update(self, delta_time):
         self.pre_update(delta_time)
-        self.on_update.dispatch(self, delta_time)
+        for handler in self.on_update.callbacks:
+            handler(self, delta_time)
         self.post_update(delta_time)
 
     def pre_update(self, delta_time):
@@ -47,35 +74,70 @@ class GameObject:
 
     def kill(self, *args, **kwargs):
         self.to_kill = True
+        if self.game is not None:
+            self.game.cancel_timers(self)
+            self.game.despawn(self)
         self.body.disable_collide = True
         self.on_kill.dispatch(self, *args, **kwargs)
 
 
+#  Handlers are keyed by identity and run by descending priority, then in the
+#  order they were added. The sorted tuple is rebuilt only when handlers change,
+#  and dispatching an event without handlers is a loop over an empty tuple
 class Event:
     def __init__(self, name):
         self.name = name
-        self.handlers = OrderedDict()
+        self.handlers = {}
+        self.callbacks = ()
+        self.order = 0
 
     def __iadd__(self, handler):
-        self.handlers[handler.__name__] = handler
+        self.add(handler)
         return self
 
-    def remove(self, name):
-        del self.handlers[name]
+    def __isub__(self, handler):
+        self.remove(handler)
+        return self
 
-    def dispatch(self, *args, **kwargs):
-        results = []
+    def __len__(self):
+        return len(self.callbacks)
 
-        for name, handler in self.handlers.items():
-            handler(*args, **kwargs)
+    def __iter__(self):
+        return iter(self.callbacks)
+
+    def add(self, handler, priority=0):
+        self.handlers[handler] = (-priority, self.order)
+        self.order += 1
+        self._compile()
+        return handler
+
+    #  Also accepts a handler name, removing every handler called that
+    def remove(self, handler):
+        if isinstance(handler, str):
+            for other in [other for other in self.handlers if other.__name__ == handler]:
+                del self.handlers[other]
+        else:
+            del self.handlers[handler]
+        self._compile()
+
+    def reset(self, handlers):
+        self.handlers = dict(handlers)
+        self._compile()
+
+    def _compile(self):
+        self.callbacks = tuple(sorted(self.handlers, key=self.handlers.__getitem__))
 
-        return results
+    def dispatch(self, *args, **kwargs):
+        for handler in self.callbacks:
+            handler(*args, **kwargs)
 
-    def __iter__(self):
-        self.index = 0
-        return self
+    def collect(self, *args, **kwargs):
+        return [handler(*args, **kwargs) for handler in self.callbacks]
 
-    def __next__(self):
-        self.index += 1
-        if self.index <= len(self.handlers):
-            return self.handlers[self.index - 1]
+    #  Stops at the first handler returning a truthy value and returns it
+    def dispatch_until(self, *args, **kwargs):
+        for handler in self.callbacks:
+            result = handler(*args, **kwargs)
+            if result:
+                return result
+        return None
@@ -10,6 +10,8 @@ from random import randint
 
 
 class Pedestal(GameObject):
+    static = True
+
     def __init__(self, *, position, item=None, pool=None):
         self.body = RigidBody(collider=CircleCollider,
                               position=position,
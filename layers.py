@@ -72,3 +72,19 @@ collisions = {
         EXPLOSIONS: False
     }
 }
+
+
+all_layers = [PLAYER, PICKUPS, ENEMIES, OBSTACLES, PLAYER_TEARS, ENEMY_TEARS, EXPLOSIONS]
+
+#  masks[layer] has bit `other` set when the two layers interact, in either
+#  direction of the table above
+masks = [0 for layer in all_layers]
+
+for layer, row in collisions.items():
+    for other, collides in row.items():
+        if collides:
+            masks[layer] |= 1 << other
+            masks[other] |= 1 << layer
+
+interacting_pairs = [(layer, other) for layer in all_layers for other in all_layers
+                     if other >= layer and masks[layer] >> other & 1]
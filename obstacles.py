@@ -13,6 +13,8 @@ class Destructible(GameObject):
 
 
 class Rock(Destructible):
+    static = True
+
     def __init__(self, position):
         self.body = RigidBody(collider=RectCollider,
                               position=position,
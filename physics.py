@@ -1,8 +1,12 @@
 import numpy as np
+from math import sqrt
 from functools import wraps
 from copy import copy
 from abc import ABC, abstractmethod
 
+SLEEP_VELOCITY = 5
+SLEEP_TIME = .5
+
 
 def vector_argument(function):
     @wraps(function)
@@ -14,6 +18,8 @@ def vector_argument(function):
 
 
 class Vector:
+    __slots__ = ("x", "y")
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
@@ -24,41 +30,52 @@ class Vector:
     def __hash__(self):
         return hash((self.x, self.y))
 
-    @vector_argument
     def __add__(self, other):
-        return Vector(self.x + other.x, self.y + other.y)
+        if type(other) is Vector or type(other) is WorldRowVector:
+            return Vector(self.x + other.x, self.y + other.y)
+        x, y = other
+        return Vector(self.x + x, self.y + y)
 
-    @vector_argument
     def __radd__(self, other):
         return self.__add__(other)
 
-    @vector_argument
     def __sub__(self, other):
-        return Vector(self.x - other.x, self.y - other.y)
+        if type(other) is Vector or type(other) is WorldRowVector:
+            return Vector(self.x - other.x, self.y - other.y)
+        x, y = other
+        return Vector(self.x - x, self.y - y)
 
-    @vector_argument
     def __rsub__(self, other):
-        return other.__sub__(self)
+        x, y = other
+        return Vector(x - self.x, y - self.y)
 
     def __mul__(self, other):
         return Vector(self.x * other, self.y * other)
 
     def __rmul__(self, other):
-        return self.__mul__(other)
+        return Vector(self.x * other, self.y * other)
 
     def __truediv__(self, other):
         return Vector(float(self.x) / other, float(self.y) / other)
 
-    @vector_argument
     def __iadd__(self, other):
-        self.x += other.x
-        self.y += other.y
+        if type(other) is Vector or type(other) is WorldRowVector:
+            self.x += other.x
+            self.y += other.y
+        else:
+            x, y = other
+            self.x += x
+            self.y += y
         return self
 
-    @vector_argument
     def __isub__(self, other):
-        self.x -= other.x
-        self.y -= other.y
+        if type(other) is Vector or type(other) is WorldRowVector:
+            self.x -= other.x
+            self.y -= other.y
+        else:
+            x, y = other
+            self.x -= x
+            self.y -= y
         return self
 
     def __imul__(self, other):
@@ -87,26 +104,390 @@ class Vector:
     def __copy__(self):
         return Vector(self.x, self.y)
 
+    def set(self, x, y):
+        self.x = x
+        self.y = y
+        return self
+
+    def add_scaled(self, other, scale):
+        self.x += other.x * scale
+        self.y += other.y * scale
+        return self
+
     def sqr_magnitude(self):
         return self.x * self.x + self.y * self.y
 
     def magnitude(self):
-        return np.sqrt(self.sqr_magnitude())
+        return sqrt(self.x * self.x + self.y * self.y)
 
+    #  The zero vector has no direction and stays zero, like the batch
+    #  narrowphase does for coincident centers
     def normal(self):
-        return self / self.magnitude()
+        mag = sqrt(self.x * self.x + self.y * self.y)
+        if mag == 0:
+            return Vector(0., 0.)
+        return Vector(float(self.x) / mag, float(self.y) / mag)
 
     def normalize(self):
-        mag = self.magnitude()
+        mag = sqrt(self.x * self.x + self.y * self.y)
+        if mag == 0:
+            self.x = self.y = 0.
+            return
         self.x /= mag
         self.y /= mag
 
-    @vector_argument
     def dot(self, other):
-        return self.x * other.x + self.y * other.y
+        if type(other) is Vector or type(other) is WorldRowVector:
+            return self.x * other.x + self.y * other.y
+        x, y = other
+        return self.x * x + self.y * y
+
+
+#  Packed (n, 2) array of vectors with the same operations as Vector,
+#  applied to every row at once. Operands are a Vector, another Vec2Array,
+#  a scalar, an (n, 2) array, a (2,) array taken as a single vector, or an
+#  (n, 1) array of per row scalars. Per row results like magnitude() are
+#  (n,) and need [:, None] before being used as operands
+class Vec2Array:
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        if isinstance(data, Vec2Array):
+            data = data.data.copy()
+        elif isinstance(data, np.ndarray):
+            data = data.astype(float).reshape(-1, 2)
+        else:
+            data = np.array([tuple(vector) for vector in data], dtype=float).reshape(-1, 2)
+        self.data = data
+
+    @classmethod
+    def zeros(cls, count):
+        return cls._wrap(np.zeros((count, 2)))
+
+    @classmethod
+    def _wrap(cls, data):
+        result = cls.__new__(cls)
+        result.data = data
+        return result
+
+    @staticmethod
+    def _operand(other):
+        if isinstance(other, Vec2Array):
+            return other.data
+        if type(other) is Vector or type(other) is WorldRowVector:
+            return (other.x, other.y)
+        if isinstance(other, np.ndarray) and other.ndim == 1 and other.shape != (2,):
+            raise ValueError(f"Vec2Array operand of shape {other.shape} is ambiguous, "
+                             "per row scalars need shape (n, 1)")
+        return other
+
+    @property
+    def x(self):
+        return self.data[:, 0]
+
+    @x.setter
+    def x(self, value):
+        self.data[:, 0] = value
+
+    @property
+    def y(self):
+        return self.data[:, 1]
+
+    @y.setter
+    def y(self, value):
+        self.data[:, 1] = value
+
+    def __repr__(self):
+        return f"Vec2Array({self.data.tolist()})"
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            x, y = self.data[index].tolist()
+            return Vector(x, y)
+        return Vec2Array._wrap(self.data[index])
+
+    def __setitem__(self, index, value):
+        self.data[index] = Vec2Array._operand(value)
+
+    def __iter__(self):
+        for x, y in self.data.tolist():
+            yield Vector(x, y)
+
+    def __add__(self, other):
+        return Vec2Array._wrap(self.data + Vec2Array._operand(other))
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        return Vec2Array._wrap(self.data - Vec2Array._operand(other))
+
+    def __rsub__(self, other):
+        return Vec2Array._wrap(Vec2Array._operand(other) - self.data)
+
+    def __mul__(self, other):
+        return Vec2Array._wrap(self.data * Vec2Array._operand(other))
+
+    def __rmul__(self, other):
+        return self.__mul__(other)
+
+    def __truediv__(self, other):
+        return Vec2Array._wrap(self.data / Vec2Array._operand(other))
+
+    def __iadd__(self, other):
+        self.data += Vec2Array._operand(other)
+        return self
+
+    def __isub__(self, other):
+        self.data -= Vec2Array._operand(other)
+        return self
+
+    def __imul__(self, other):
+        self.data *= Vec2Array._operand(other)
+        return self
+
+    def __itruediv__(self, other):
+        self.data /= Vec2Array._operand(other)
+        return self
+
+    def __neg__(self):
+        return Vec2Array._wrap(-self.data)
+
+    def __copy__(self):
+        return Vec2Array._wrap(self.data.copy())
+
+    def sqr_magnitude(self):
+        return np.einsum("ij,ij->i", self.data, self.data)
+
+    def magnitude(self):
+        return np.sqrt(self.sqr_magnitude())
+
+    def normal(self):
+        return Vec2Array._wrap(_safe_normal(self.data, self.magnitude()))
+
+    def normalize(self):
+        self.data[:] = _safe_normal(self.data, self.magnitude())
+
+    def dot(self, other):
+        return (self.data * Vec2Array._operand(other)).sum(axis=1)
+
+
+_set_x = Vector.x.__set__
+_set_y = Vector.y.__set__
+
+
+#  A body field read from a PhysicsWorld row. It is a copy, so changing it in
+#  place could never reach the world and raises instead. Augmented assignments
+#  like body.velocity += force still work, since they build a new Vector which
+#  the descriptor writes back to the row
+class WorldRowVector(Vector):
+    __slots__ = ()
+
+    def __init__(self, x, y):
+        _set_x(self, x)
+        _set_y(self, y)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Cannot set {name} on a vector read from a PhysicsWorld, "
+                             "assign the whole field on the body instead")
+
+    def __iadd__(self, other):
+        return self + other
+
+    def __isub__(self, other):
+        return self - other
+
+    def __imul__(self, other):
+        return self * other
+
+    def __itruediv__(self, other):
+        return self / other
+
+
+#  Reads return a WorldRowVector copy of the row while the body is in a world
+class WorldVector:
+    def __init__(self, array_name):
+        self.array_name = array_name
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        if instance.world is None:
+            return instance.__dict__[self.name]
+        x, y = getattr(instance.world, self.array_name)[instance.index].tolist()
+        return WorldRowVector(x, y)
+
+    def __set__(self, instance, value):
+        if instance.world is None:
+            instance.__dict__[self.name] = value
+        else:
+            getattr(instance.world, self.array_name)[instance.index] = tuple(value)
+
+    def pack(self, value):
+        return tuple(value)
+
+    def unpack(self, row):
+        return Vector(*row.tolist())
+
+
+class WorldScalar(WorldVector):
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        if instance.world is None:
+            return instance.__dict__[self.name]
+        return getattr(instance.world, self.array_name)[instance.index].item()
+
+    def __set__(self, instance, value):
+        if instance.world is None:
+            instance.__dict__[self.name] = value
+        else:
+            getattr(instance.world, self.array_name)[instance.index] = value
+
+    def pack(self, value):
+        return value
+
+    def unpack(self, row):
+        return row.item()
+
+
+#  Structure of arrays storage for every body of a room. Bodies and colliders
+#  added to the world keep their API, but their fields become views onto rows
+class PhysicsWorld:
+    arrays = {
+        "position": ((2,), float),
+        "previous_position": ((2,), float),
+        "velocity": ((2,), float),
+        "force": ((2,), float),
+        "inverse_mass": ((), float),
+        "damping": ((), float),
+        "half_size": ((2,), float),
+        "is_rect": ((), bool),
+        "sleeping": ((), bool),
+        "rest_time": ((), float),
+        "can_sleep": ((), bool)
+    }
+
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.bodies = []
+        for name, (shape, dtype) in PhysicsWorld.arrays.items():
+            setattr(self, name, np.zeros((capacity,) + shape, dtype=dtype))
+
+    def capacity(self):
+        return len(self.position)
+
+    def _grow(self):
+        for name in PhysicsWorld.arrays:
+            old = getattr(self, name)
+            new = np.zeros((2 * len(old),) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _members(self, body):
+        return (body, body.collider)
+
+    def add(self, body):
+        if body.world is not None:
+            raise ValueError("Body already belongs to a world")
+        if self.count == self.capacity():
+            self._grow()
+
+        index = self.count
+        for name in PhysicsWorld.arrays:
+            getattr(self, name)[index] = 0
+        for member in self._members(body):
+            for name in member.world_fields:
+                field = getattr(type(member), name)
+                getattr(self, field.array_name)[index] = field.pack(member.__dict__.pop(name))
+            member.world = self
+            member.index = index
+
+        self.previous_position[index] = self.position[index]
+        self.half_size[index] = body.collider.half_size()
+        self.is_rect[index] = type(body.collider) is RectCollider
+        self.can_sleep[index] = body.can_sleep
+
+        self.bodies.append(body)
+        self.count += 1
+
+    def remove(self, body):
+        if body.world is not self:
+            return
+        index = body.index
+        for member in self._members(body):
+            for name in member.world_fields:
+                field = getattr(type(member), name)
+                member.__dict__[name] = field.unpack(getattr(self, field.array_name)[index])
+            member.world = None
+            member.index = None
+
+        last = self.count - 1
+        if index != last:
+            for name in PhysicsWorld.arrays:
+                array = getattr(self, name)
+                array[index] = array[last]
+            moved = self.bodies[last]
+            self.bodies[index] = moved
+            moved.index = moved.collider.index = index
+        self.bodies.pop()
+        self.count -= 1
+
+    def clear(self):
+        while self.bodies:
+            self.remove(self.bodies[-1])
+
+    def step(self, delta_time):
+        #  Movement since the last step, including contact corrections, which
+        #  never show up in the velocity
+        drift = self.position[:self.count] - self.previous_position[:self.count]
+        self.previous_position[:self.count] = self.position[:self.count]
+
+        awake = np.flatnonzero(~self.sleeping[:self.count])
+        if len(awake) == 0:
+            return
+        drift = drift[awake]
+
+        velocity = self.velocity[awake]
+        velocity += delta_time * self.force[awake] * self.inverse_mass[awake, None]
+        displacement = delta_time * velocity
+        self.position[awake] += displacement
+        self.velocity[awake] = velocity
+        self.force[awake] = velocity * -self.damping[awake, None]
+
+        resting = (((velocity * velocity).sum(axis=1) < SLEEP_VELOCITY * SLEEP_VELOCITY) &
+                   ((drift * drift).sum(axis=1) < (SLEEP_VELOCITY * delta_time) ** 2))
+        rest_time = np.where(resting, self.rest_time[awake] + delta_time, 0)
+        self.rest_time[awake] = rest_time
+        falling_asleep = awake[(rest_time >= SLEEP_TIME) & self.can_sleep[awake]]
+        self.sleeping[falling_asleep] = True
+        self.velocity[falling_asleep] = 0
+        self.force[falling_asleep] = 0
+
+        for index in awake[displacement.any(axis=1)].tolist():
+            self.bodies[index].collider.moved()
+
+    #  Same results as is_colliding and collision_manifold, for every pair of
+    #  rows (a[i], b[i]) at once
+    def narrowphase(self, a, b):
+        return batch_narrowphase(self.position[a], self.half_size[a], self.is_rect[a],
+                                 self.position[b], self.half_size[b], self.is_rect[b])
 
 
 class IBody(ABC):
+    world = None
+    index = None
+    world_fields = ()
+    sleeping = False
+    can_sleep = False
+    continuous = False
+
     def __init__(self, collider, **kwargs):
         if isinstance(collider, type):
             self.collider = collider(**kwargs)
@@ -115,6 +496,11 @@ class IBody(ABC):
         else:
             raise TypeError(collider)
 
+        self.collider.body = self
+        self.disable_collide = False
+
+    def reset(self, **kwargs):
+        self.collider.reset(**kwargs)
         self.disable_collide = False
 
     @abstractmethod
@@ -125,8 +511,23 @@ class IBody(ABC):
         if not self.disable_collide:
             self.collide(other)
 
+    def wake(self):
+        pass
+
+    def is_resting(self):
+        return True
+
 
 class RigidBody(IBody):
+    world_fields = ("velocity", "total_force", "inverse_mass", "damping",
+                    "sleeping", "rest_time")
+    velocity = WorldVector("velocity")
+    total_force = WorldVector("force")
+    inverse_mass = WorldScalar("inverse_mass")
+    damping = WorldScalar("damping")
+    sleeping = WorldScalar("sleeping")
+    rest_time = WorldScalar("rest_time")
+
     def __init__(self, *, collider, **kwargs):
         super().__init__(collider, **kwargs)
 
@@ -138,29 +539,74 @@ class RigidBody(IBody):
         self.damping = kwargs.get("damping", 0.5)
         self.disable_collide = kwargs.get("disable_collide", False)
         self.is_player = kwargs.get("is_player", False)
+        self.can_sleep = kwargs.get("can_sleep", True)
+        self.sleeping = False
+        self.rest_time = 0
 
     def update(self, delta_time):
-        self.velocity += delta_time * self.total_force * self.inverse_mass
-        self.collider.move(delta_time * self.velocity)
+        if self.sleeping:
+            return
 
-        self.total_force = Vector(0, 0)
-        self.add_force(-self.velocity * self.damping)
+        velocity = self.velocity
+        velocity.add_scaled(self.total_force, delta_time * self.inverse_mass)
+        self.collider.move(delta_time * velocity)
+
+        self.total_force.set(-velocity.x * self.damping, -velocity.y * self.damping)
+
+        if self.is_resting():
+            self.rest_time += delta_time
+            if self.can_sleep and self.rest_time >= SLEEP_TIME:
+                self.sleep()
+        else:
+            self.rest_time = 0
 
     @vector_argument
     def add_force(self, force):
+        if force.x or force.y:
+            self.wake()
         self.total_force += force
 
+    def is_resting(self):
+        return self.velocity.sqr_magnitude() < SLEEP_VELOCITY * SLEEP_VELOCITY
+
+    def sleep(self):
+        self.sleeping = True
+        self.velocity = Vector(0, 0)
+        self.total_force = Vector(0, 0)
+
+    def wake(self):
+        self.sleeping = False
+        self.rest_time = 0
+
 
 class KinematicBody(IBody):
+    world_fields = ("velocity",)
+    velocity = WorldVector("velocity")
+
     def __init__(self, *, collider, **kwargs):
         super().__init__(collider, **kwargs)
         self.velocity = Vector(*kwargs["velocity"])
+        self.continuous = kwargs.get("continuous", False)
+
+    def reset(self, *, velocity, **kwargs):
+        super().reset(**kwargs)
+        self.velocity = Vector(*velocity)
 
     def update(self, delta_time):
         self.collider.move(delta_time * self.velocity)
 
+    def is_resting(self):
+        return self.velocity.sqr_magnitude() < SLEEP_VELOCITY * SLEEP_VELOCITY
+
 
 class ICollider(ABC):
+    broadphase = None
+    body = None
+    world = None
+    index = None
+    world_fields = ("_center",)
+    _center = WorldVector("position")
+
     @abstractmethod
     def top_left(self):
         pass
@@ -181,11 +627,22 @@ class ICollider(ABC):
     def move_to(self, new_center):
         pass
 
+    def moved(self):
+        if self.broadphase is not None:
+            self.broadphase.update(self)
+
+    def teleported(self):
+        if self.world is not None:
+            self.world.previous_position[self.index] = self.world.position[self.index]
+        self.moved()
+        if self.body is not None:
+            self.body.wake()
+
 
 class RectCollider(ICollider):
     def __init__(self, size, position, **kwargs):
         self.width, self.height = size
-        self._position = position - self._half_diagonal()
+        self._center = Vector(*position)
 
     def _half_diagonal(self):
         return Vector(self.width / 2, self.height / 2)
@@ -193,22 +650,31 @@ class RectCollider(ICollider):
     def size(self):
         return (self.width, self.height)
 
+    def half_size(self):
+        return (self.width / 2, self.height / 2)
+
+    def reset(self, size, position, **kwargs):
+        self.width, self.height = size
+        self._center = Vector(*position)
+
     @vector_argument
     def move(self, move_vector):
-        self._position += move_vector
+        self._center += move_vector
+        self.moved()
 
     @vector_argument
     def move_to(self, new_center):
-        self._position = new_center - self._half_diagonal()
+        self._center = copy(new_center)
+        self.teleported()
 
     def top_left(self):
-        return self._position
+        return self._center - self._half_diagonal()
 
     def bottom_right(self):
-        return self._position + (self.width, self.height)
+        return self._center + self._half_diagonal()
 
     def center(self):
-        return self._position + self._half_diagonal()
+        return self._center
 
     def is_colliding(self, other):
         if type(other) is RectCollider:
@@ -220,24 +686,33 @@ class RectCollider(ICollider):
 class CircleCollider(ICollider):
     def __init__(self, radius, position, **kwargs):
         self.radius = radius
-        self._position = Vector(*position)
+        self._center = Vector(*position)
+
+    def half_size(self):
+        return (self.radius, self.radius)
+
+    def reset(self, radius, position, **kwargs):
+        self.radius = radius
+        self._center = Vector(*position)
 
     @vector_argument
     def move(self, move_vector):
-        self._position += move_vector
+        self._center += move_vector
+        self.moved()
 
     @vector_argument
     def move_to(self, new_center):
-        self._position = copy(new_center)
+        self._center = copy(new_center)
+        self.teleported()
 
     def top_left(self):
-        return self._position - (self.radius, self.radius)
+        return self._center - (self.radius, self.radius)
 
     def bottom_right(self):
-        return self._position + (self.radius, self.radius)
+        return self._center + (self.radius, self.radius)
 
     def center(self):
-        return self._position
+        return self._center
 
     def is_colliding(self, other):
         if type(other) is RectCollider:
@@ -251,10 +726,10 @@ def clamp(n, low, high):
 
 
 def find_closest(r, c):
-    closest_point = copy(c.center())
-    closest_point.x = clamp(closest_point.x, r.top_left().x, r.top_left().x + r.width)
-    closest_point.y = clamp(closest_point.y, r.top_left().y, r.top_left().y + r.height)
-    return closest_point
+    top_left = r.top_left()
+    center = c.center()
+    return Vector(clamp(center.x, top_left.x, top_left.x + r.width),
+                  clamp(center.y, top_left.y, top_left.y + r.height))
 
 
 def detect_collision_RectRect(r1, r2):
@@ -303,7 +778,7 @@ def resolve_collision_RectCircle(r, c):
     difference = c.center() - rect_center
     closest = find_closest(r, c)
 
-    if closest == c.center():
+    if closest.x == c.center().x and closest.y == c.center().y:
         inside = True
         if abs(difference.x) > abs(difference.y):
             if closest.x > r.top_left().x + r.width / 2:
@@ -319,41 +794,184 @@ def resolve_collision_RectCircle(r, c):
         inside = False
 
     normal = closest - c.center()
-    penetration = c.radius - normal.magnitude()
-    return (normal.normal() if not inside else -normal.normal(), penetration)
-
-
-def resolveCollision(a, b, delta_time):
-    if (type(a) is KinematicBody or type(b) is KinematicBody
-       or a.disable_collide or b.disable_collide):
-        return
+    if inside:
+        return (-normal.normal(), c.radius + normal.magnitude())
+    return (normal.normal(), c.radius - normal.magnitude())
+
+
+#  Returns (hit, normal, penetration) arrays. Rects use the half size as
+#  (width / 2, height / 2), circles as (radius, radius)
+def batch_narrowphase(center_a, half_a, rect_a, center_b, half_b, rect_b):
+    count = len(center_a)
+    hit = np.zeros(count, dtype=bool)
+    normal = np.zeros((count, 2))
+    penetration = np.zeros(count)
+
+    circles = ~rect_a & ~rect_b
+    if circles.any():
+        vec = center_a[circles] - center_b[circles]
+        radii = half_a[circles, 0] + half_b[circles, 0]
+        distance = np.hypot(vec[:, 0], vec[:, 1])
+        hit[circles] = distance * distance <= radii * radii
+        normal[circles] = _safe_normal(vec, distance)
+        penetration[circles] = radii - distance
+
+    rects = rect_a & rect_b
+    if rects.any():
+        top_left_a = center_a[rects] - half_a[rects]
+        top_left_b = center_b[rects] - half_b[rects]
+        hit[rects] = ((top_left_a < top_left_b + 2 * half_b[rects]) &
+                      (top_left_a + 2 * half_a[rects] > top_left_b)).all(axis=1)
+        vec = top_left_b - top_left_a
+        overlap = half_a[rects] + half_b[rects] - np.abs(vec)
+        use_x = overlap[:, 0] > overlap[:, 1]
+        axis = np.where(use_x, 0, 1)
+        rows = np.arange(len(vec))
+        rect_normal = np.zeros_like(vec)
+        rect_normal[rows, axis] = np.where(vec[rows, axis] < 0, -1, 1)
+        normal[rects] = rect_normal
+        penetration[rects] = overlap[rows, axis]
+
+    for rect_first in (True, False):
+        mixed = (rect_a & ~rect_b) if rect_first else (~rect_a & rect_b)
+        if not mixed.any():
+            continue
+        if rect_first:
+            rect_center, rect_half = center_a[mixed], half_a[mixed]
+            circle_center, radius = center_b[mixed], half_b[mixed, 0]
+        else:
+            rect_center, rect_half = center_b[mixed], half_b[mixed]
+            circle_center, radius = center_a[mixed], half_a[mixed, 0]
+        mixed_hit, mixed_normal, mixed_penetration = _batch_rect_circle(
+            rect_center, rect_half, circle_center, radius)
+        hit[mixed] = mixed_hit
+        normal[mixed] = mixed_normal if rect_first else -mixed_normal
+        penetration[mixed] = mixed_penetration
+
+    return hit, normal, penetration
+
+
+def _safe_normal(vec, length):
+    result = np.zeros_like(vec)
+    nonzero = length > 0
+    result[nonzero] = vec[nonzero] / length[nonzero, None]
+    return result
+
+
+def _batch_rect_circle(rect_center, rect_half, circle_center, radius):
+    top_left = rect_center - rect_half
+    bottom_right = top_left + 2 * rect_half
+    closest = np.clip(circle_center, top_left, bottom_right)
+
+    offset = closest - circle_center
+    hit = (offset * offset).sum(axis=1) <= radius * radius
+
+    inside = (closest == circle_center).all(axis=1)
+    if inside.any():
+        difference = circle_center[inside] - rect_center[inside]
+        axis = np.where(np.abs(difference[:, 0]) > np.abs(difference[:, 1]), 0, 1)
+        rows = np.arange(len(axis))
+        inside_closest = closest[inside]
+        low = top_left[inside][rows, axis]
+        high = bottom_right[inside][rows, axis]
+        middle = low + rect_half[inside][rows, axis]
+        inside_closest[rows, axis] = np.where(inside_closest[rows, axis] > middle, high, low)
+        closest[inside] = inside_closest
+
+    normal = closest - circle_center
+    length = np.hypot(normal[:, 0], normal[:, 1])
+    normal = _safe_normal(normal, length)
+    normal[inside] *= -1
+    penetration = np.where(inside, radius + length, radius - length)
+    return hit, normal, penetration
+
+
+#  Returns (normal, penetration) for two bodies, the normal pointing from b to a
+def collision_manifold(a, b):
     if type(a.collider) is RectCollider:
         if type(b.collider) is RectCollider:
-            normal, penetration = resolve_collision_RectRect(a.collider, b.collider)
+            return resolve_collision_RectRect(a.collider, b.collider)
         elif type(b.collider) is CircleCollider:
-            normal, penetration = resolve_collision_RectCircle(a.collider, b.collider)
+            return resolve_collision_RectCircle(a.collider, b.collider)
     elif type(a.collider) is CircleCollider:
         if type(b.collider) is CircleCollider:
-            normal, penetration = resolve_collision_CircleCircle(a.collider, b.collider)
+            return resolve_collision_CircleCircle(a.collider, b.collider)
         elif type(b.collider) is RectCollider:
             normal, penetration = resolve_collision_RectCircle(b.collider, a.collider)
-            normal *= -1
-
-    rv = a.velocity - b.velocity
-    vel_on_normal = rv.dot(normal)
-    if vel_on_normal > 0:
-        return
-
-    e = .2
-    j = (-(1 + e) * vel_on_normal) / (a.inverse_mass + b.inverse_mass)
-    impulse = j * normal
-    a.velocity += a.inverse_mass * impulse
-    b.velocity -= b.inverse_mass * impulse
-
-    k = .1
-    correction = (penetration / (a.inverse_mass + b.inverse_mass)) * k * normal
-    a.collider.move(a.inverse_mass * correction)
-    b.collider.move(-b.inverse_mass * correction)
+            return (-normal, penetration)
+
+
+#  Earliest fraction of `motion` at which a circle starting at `center` touches
+#  `other`, 0 if they already overlap, None if they never touch
+def sweep_circle(center, radius, motion, other):
+    if type(other) is CircleCollider:
+        return sweep_circle_circle(center, radius, motion, other.center(), other.radius)
+    if type(other) is RectCollider:
+        return sweep_circle_rect(center, radius, motion, other)
+
+
+def sweep_circle_circle(center, radius, motion, other_center, other_radius):
+    offset = center - other_center
+    radii = radius + other_radius
+    c = offset.sqr_magnitude() - radii * radii
+    if c <= 0:
+        return 0
+    a = motion.sqr_magnitude()
+    b = 2 * offset.dot(motion)
+    if a == 0 or b >= 0:
+        return None
+    discriminant = b * b - 4 * a * c
+    if discriminant < 0:
+        return None
+    t = (-b - sqrt(discriminant)) / (2 * a)
+    return t if t <= 1 else None
+
+
+def sweep_circle_rect(center, radius, motion, rect):
+    top_left = rect.top_left()
+    bottom_right = rect.bottom_right()
+    closest = Vector(clamp(center.x, top_left.x, bottom_right.x),
+                     clamp(center.y, top_left.y, bottom_right.y))
+    if (closest - center).sqr_magnitude() <= radius * radius:
+        return 0
+
+    #  Slab test against the rect grown by the radius on every side
+    t_enter, t_exit = 0, 1
+    for start, delta, low, high in ((center.x, motion.x, top_left.x, bottom_right.x),
+                                    (center.y, motion.y, top_left.y, bottom_right.y)):
+        low -= radius
+        high += radius
+        if delta == 0:
+            if start < low or start > high:
+                return None
+            continue
+        t0 = (low - start) / delta
+        t1 = (high - start) / delta
+        if t0 > t1:
+            t0, t1 = t1, t0
+        t_enter = max(t_enter, t0)
+        t_exit = min(t_exit, t1)
+        if t_enter > t_exit:
+            return None
+
+    #  Entering through a corner of the grown rect only counts if the rounded
+    #  corner is hit as well
+    hit = center + motion * t_enter
+    outside_x = hit.x < top_left.x or hit.x > bottom_right.x
+    outside_y = hit.y < top_left.y or hit.y > bottom_right.y
+    if outside_x and outside_y:
+        corner = Vector(top_left.x if hit.x < top_left.x else bottom_right.x,
+                        top_left.y if hit.y < top_left.y else bottom_right.y)
+        return sweep_circle_circle(center, radius, motion, corner, 0)
+    return t_enter
+
+
+#  A sleeping body is woken by anything that touches it while still moving
+def wake_on_contact(a, b):
+    if a.sleeping and not b.sleeping and not b.is_resting():
+        a.wake()
+    elif b.sleeping and not a.sleeping and not a.is_resting():
+        b.wake()
 
 
 def normalized_direction(frm, to):
@@ -16,7 +16,7 @@ class Pickup(GameObject):
         self.layer = layers.PICKUPS
 
         def do_pickup(self, player):
-            if not self.action(player):
+            if player.layer == layers.PLAYER and not self.action(player):
                 self.kill()
 
         self.on_collide += do_pickup
@@ -3,7 +3,7 @@ from game_object import GameObject, Event
 from physics import RigidBody, Vector, CircleCollider
 from debug_sprites import CircleSprite,  colors
 from health import PlayerHealth
-from tears import PlayerTear
+from tears import tear_pool
 from bombs import PlacedBomb
 import layers
 
@@ -43,7 +43,8 @@ class Player(GameObject):
                               position=position,
                               radius=20,
                               damping=3.5,
-                              is_player=True)
+                              is_player=True,
+                              can_sleep=False)
 
         self.sprite = CircleSprite(colors.BLACK, self.body.collider.radius)
         self.layer = layers.PLAYER
@@ -71,9 +72,9 @@ class Player(GameObject):
         self.items = []
 
     def damage(self):
-        stop_damage = self.on_damage.dispatch(self)
+        stop_damage = self.on_damage.dispatch_until(self)
 
-        if self.invulnerable or any(stop_damage):
+        if self.invulnerable or stop_damage:
             return False
 
         self.health.damage()
@@ -82,7 +83,7 @@ class Player(GameObject):
         def reset_invulnerable():
             self.invulnerable = False
 
-        self.game.add_timer(INVULNERABLE_TIME, reset_invulnerable)
+        self.game.add_timer(INVULNERABLE_TIME, reset_invulnerable, owner=self)
 
         return True
 
@@ -101,7 +102,7 @@ class Player(GameObject):
 
 
 def register_keys(self, delta_time):
-    keys = pg.key.get_pressed()
+    keys = self.game.get_pressed()
     self.pressed_keys = {}
     self.pressed_keys['w'] = keys[pg.K_w]
     self.pressed_keys['a'] = keys[pg.K_a]
@@ -160,17 +161,17 @@ def fire(self, delta_time):
     velocity.normalize()
     velocity *= self.shot_speed
 
-    tear = PlayerTear(position=self.body.collider.center(),
-                      velocity=velocity,
-                      range=self.range,
-                      damage=self.shot_damage)
+    tear = tear_pool.acquire(position=self.body.collider.center(),
+                             velocity=velocity,
+                             range=self.range,
+                             damage=self.shot_damage)
     self.game.add(tear)
     self.can_shoot = False
 
     def reset_shoot():
         self.can_shoot = True
 
-    self.game.add_timer(self.tears / 10, reset_shoot)
+    self.game.add_timer(self.tears / 10, reset_shoot, owner=self)
 
     self.on_fire.dispatch(self, tear)
 
@@ -183,7 +184,7 @@ def bomb_place(self, delta_time):
         def reset_bomb_place():
             self.can_place_bomb = True
 
-        self.game.add_timer(3, reset_bomb_place)
+        self.game.add_timer(3, reset_bomb_place, owner=self)
 
         self.game.add(PlacedBomb(position=self.body.collider.center()))
 
@@ -0,0 +1,28 @@
+#  Killed objects of short lived types go back to a free list once the game
+#  removes them, and the next spawn resets one of them instead of building a
+#  new object, body, collider and sprite
+class ObjectPool:
+    def __init__(self, cls, capacity=64):
+        self.cls = cls
+        self.capacity = capacity
+        self.free = []
+
+    def __len__(self):
+        return len(self.free)
+
+    def acquire(self, **kwargs):
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(**kwargs)
+        else:
+            obj = self.cls(**kwargs)
+            obj.pool = self
+            obj.save_defaults()
+        return obj
+
+    def release(self, obj):
+        if len(self.free) < self.capacity:
+            self.free.append(obj)
+
+    def clear(self):
+        self.free.clear()
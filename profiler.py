@@ -0,0 +1,87 @@
+import numpy as np
+import json
+from time import perf_counter
+
+PHASES = ("input", "physics", "update", "spawn", "collisions", "timers",
+          "background", "sprites", "ui", "draw", "flip", "wait")
+
+
+#  Splits every frame into phases: mark(phase) charges the time since the
+#  previous mark to that phase. Frames go into a ring buffer holding the
+#  last `capacity` of them, one column per phase
+class PhaseProfiler:
+    def __init__(self, phases=PHASES, capacity=3600):
+        self.phases = phases
+        self.columns = {phase: i for i, phase in enumerate(phases)}
+        self.capacity = capacity
+        self.durations = np.zeros((capacity, len(phases)))
+        self.starts = np.zeros(capacity)
+        self.count = 0
+        self.origin = perf_counter()
+        self.frame_start = self.last = self.origin
+        self.current = [0.0] * len(phases)
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def begin_frame(self):
+        self.frame_start = self.last = perf_counter()
+        self.current = [0.0] * len(self.phases)
+
+    def mark(self, phase):
+        now = perf_counter()
+        self.current[self.columns[phase]] += now - self.last
+        self.last = now
+
+    def end_frame(self):
+        row = self.count % self.capacity
+        self.durations[row] = self.current
+        self.starts[row] = self.frame_start - self.origin
+        self.count += 1
+
+    #  Recorded frames, oldest first, as (start times, durations) in seconds
+    def frames(self):
+        if self.count <= self.capacity:
+            return self.starts[:self.count], self.durations[:self.count]
+        row = self.count % self.capacity
+        return (np.roll(self.starts, -row),
+                np.roll(self.durations, -row, axis=0))
+
+    #  Rows are the requested percentiles, columns the phases, then the total
+    def percentiles(self, q=(50, 95, 99)):
+        starts, durations = self.frames()
+        if not len(durations):
+            return np.zeros((len(q), len(self.phases) + 1))
+        totals = durations.sum(axis=1, keepdims=True)
+        return np.percentile(np.hstack((durations, totals)), q, axis=0)
+
+    def export_csv(self, path):
+        starts, durations = self.frames()
+        first = self.count - len(starts)
+        header = ["frame", "start_ms"] + [phase + "_ms" for phase in self.phases] + ["total_ms"]
+        with open(path, 'w') as file:
+            file.write(",".join(header) + "\n")
+            for i, (start, row) in enumerate(zip(starts.tolist(), durations.tolist())):
+                values = [start] + row + [sum(row)]
+                file.write(",".join([str(first + i)] + [f"{value * 1000:.4f}" for value in values])
+                           + "\n")
+
+    #  Chrome trace event JSON, viewable in chrome://tracing or Perfetto. Phases
+    #  that ran more than once in a frame, like fixed timestep catch up steps,
+    #  are merged into one event and laid out back to back in phase order
+    def export_chrome_trace(self, path):
+        starts, durations = self.frames()
+        first = self.count - len(starts)
+        events = []
+        for i, (start, row) in enumerate(zip(starts.tolist(), durations.tolist())):
+            time = start * 1e6
+            events.append({"name": f"frame {first + i}", "cat": "frame", "ph": "X",
+                           "ts": time, "dur": sum(row) * 1e6, "pid": 0, "tid": 0})
+            for phase, duration in zip(self.phases, row):
+                if duration:
+                    events.append({"name": phase, "cat": "phase", "ph": "X",
+                                   "ts": time, "dur": duration * 1e6, "pid": 0, "tid": 1})
+                    time += duration * 1e6
+
+        with open(path, 'w') as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
@@ -0,0 +1,87 @@
+import pygame as pg
+from debug_sprites import colors
+
+
+#  Remembers where every sprite and UI element was drawn on the last frame, and
+#  only repaints and pushes to the display the areas where something moved,
+#  changed image, appeared or disappeared. invalidate() forces a full redraw
+class DirtyRenderer:
+    def __init__(self, screen, *, background=colors.WHITE, profiler=None):
+        self.screen = screen
+        self.profiler = profiler
+        self.background_color = background
+        self.background = pg.Surface(screen.get_size()).convert()
+        self.background.fill(background)
+        self.drawn = {}
+        self.full_redraw = True
+
+    def invalidate(self):
+        self.full_redraw = True
+
+    #  Layers that never move are drawn once into the background, which is
+    #  what dirty areas are restored from
+    def draw_background(self, layers):
+        self.background.fill(self.background_color)
+        for image, rect in layers:
+            self.background.blit(image, rect)
+        self.invalidate()
+
+    def draw(self, sprites, ui_elements):
+        current = {}
+        offset = sprites.offset
+        for sprite in sprites.sprites():
+            current[sprite] = (sprite.image, sprite.rect.move(*offset))
+        self.mark("sprites")
+        for element in ui_elements:
+            image = element.get_render()
+            current[element] = (image, image.get_rect(topleft=tuple(element.position)))
+        self.mark("ui")
+
+        if self.full_redraw:
+            self.full_redraw = False
+            self.drawn = current
+            self.screen.blit(self.background, (0, 0))
+            for image, rect in current.values():
+                self.screen.blit(image, rect)
+            self.mark("draw")
+            pg.display.flip()
+            self.mark("flip")
+            return
+
+        dirty = []
+        drawn = self.drawn
+        for key, (image, rect) in current.items():
+            previous = drawn.pop(key, None)
+            if previous is None:
+                dirty.append(rect)
+            elif previous[0] is not image or previous[1] != rect:
+                if previous[1].colliderect(rect):
+                    dirty.append(previous[1].union(rect))
+                else:
+                    dirty.append(previous[1])
+                    dirty.append(rect)
+        for image, rect in drawn.values():
+            dirty.append(rect)
+        self.drawn = current
+
+        if not dirty:
+            self.mark("draw")
+            return
+
+        layers = list(current.values())
+        rects = [rect for image, rect in layers]
+        screen = self.screen
+        for area in dirty:
+            screen.set_clip(area)
+            screen.blit(self.background, area, area)
+            for i in area.collidelistall(rects):
+                screen.blit(*layers[i])
+        screen.set_clip(None)
+        self.mark("draw")
+
+        pg.display.update(dirty)
+        self.mark("flip")
+
+    def mark(self, phase):
+        if self.profiler is not None:
+            self.profiler.mark(phase)
@@ -0,0 +1,194 @@
+import os
+import json
+import pickle
+from random import choices
+from physics import Vector
+from globals import TILE_SIZE, ROOM_WIDTH, ROOM_HEIGHT, types
+
+TEMPLATE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+CACHE_VERSION = 2
+
+#  Bit i of a door mask is set when the room has a door in direction i, in the
+#  DOWN, UP, RIGHT, LEFT order of rooms.py
+ALL_DOORS = 0b1111
+DIRECTION_NAMES = ("down", "up", "right", "left")
+
+
+def door_mask(neighbors):
+    mask = 0
+    for i, neighbor in enumerate(neighbors):
+        if neighbor:
+            mask |= 1 << i
+    return mask
+
+
+class RoomTemplate:
+    def __init__(self, objects, allowed=ALL_DOORS, weight=1):
+        self.objects = objects
+        self.allowed = allowed
+        self.weight = weight
+
+    def allows(self, mask):
+        return not mask & ~self.allowed
+
+    def instantiate(self):
+        return [constructor(position=Vector(x, y), **params)
+                for constructor, x, y, params in self.objects]
+
+
+#  Templates of one room type, grouped by every door mask they allow, so a
+#  room picks its template with a single weighted draw
+class TemplateSet:
+    def __init__(self, room_type, templates):
+        self.room_type = room_type
+        self.templates = templates
+        self.by_mask = []
+        for mask in range(ALL_DOORS + 1):
+            compatible = [template for template in templates if template.allows(mask)]
+            weights = []
+            total = 0
+            for template in compatible:
+                total += template.weight
+                weights.append(total)
+            self.by_mask.append((compatible, weights))
+
+    def __len__(self):
+        return len(self.templates)
+
+    def __iter__(self):
+        return iter(self.templates)
+
+    def choose(self, mask):
+        compatible, weights = self.by_mask[mask]
+        if not compatible:
+            doors = ", ".join(name for i, name in enumerate(DIRECTION_NAMES) if mask >> i & 1)
+            raise ValueError(f"No {self.room_type} template allows doors to the "
+                             f"{doors or 'no side'} (door mask {mask:04b})")
+        return choices(compatible, cum_weights=weights)[0]
+
+
+#  Checks a template as parsed from JSON and turns it into plain tuples, with
+#  positions already scaled from tiles to the center of the tile in pixels
+def compile_template(template, where):
+    if not isinstance(template, dict) or not isinstance(template.get("objects"), list):
+        raise ValueError(f"{where}: a template needs an \"objects\" list")
+
+    allowed = ALL_DOORS
+    if "neighbors" in template:
+        neighbors = template["neighbors"]
+        if (not isinstance(neighbors, list) or len(neighbors) != 4 or
+                not all(isinstance(neighbor, bool) for neighbor in neighbors)):
+            raise ValueError(f"{where}: \"neighbors\" must be four booleans")
+        allowed = door_mask(neighbors)
+
+    weight = template.get("weight", 1)
+    if not isinstance(weight, (int, float)) or weight <= 0:
+        raise ValueError(f"{where}: \"weight\" must be a positive number")
+
+    objects = []
+    for i, obj in enumerate(template["objects"]):
+        if not isinstance(obj, dict):
+            raise ValueError(f"{where}, object {i}: expected an object, got {obj!r}")
+        if not isinstance(obj.get("type"), str):
+            raise ValueError(f"{where}, object {i}: missing \"type\"")
+        position = obj.get("position")
+        if not isinstance(position, (list, tuple)) or len(position) != 2:
+            raise ValueError(f"{where}, object {i}: \"position\" must be [x, y], "
+                             f"got {position!r}")
+        x, y = position
+        if not (isinstance(x, (int, float)) and 0 <= x < ROOM_WIDTH and
+                isinstance(y, (int, float)) and 0 <= y < ROOM_HEIGHT):
+            raise ValueError(f"{where}, object {i}: position {position} "
+                             f"is outside the {ROOM_WIDTH}x{ROOM_HEIGHT} room")
+        params = obj.get("params", {})
+        if not isinstance(params, dict):
+            raise ValueError(f"{where}, object {i}: \"params\" must be an object")
+        objects.append((obj["type"],
+                        x * TILE_SIZE + TILE_SIZE / 2,
+                        y * TILE_SIZE + TILE_SIZE / 2,
+                        params))
+
+    return (tuple(objects), allowed, weight)
+
+
+#  Templates of every room type, compiled the first time that type is asked
+#  for. The compiled form is pickled next to the JSON file and reused for as
+#  long as the cache version, the tile and room sizes the positions were
+#  scaled and checked with, and the JSON file's size and mtime match
+class TemplateLibrary:
+    def __init__(self, directory=TEMPLATE_DIRECTORY):
+        self.directory = directory
+        self.loaded = {}
+
+    def __getitem__(self, room_type):
+        templates = self.loaded.get(room_type)
+        if templates is None:
+            templates = self.loaded[room_type] = self.load(room_type)
+        return templates
+
+    def room_types(self):
+        return sorted(name[:-len(".json")] for name in os.listdir(self.directory)
+                      if name.endswith(".json"))
+
+    def source_path(self, room_type):
+        return os.path.join(self.directory, room_type + ".json")
+
+    def cache_path(self, room_type):
+        return os.path.join(self.directory, room_type + ".pickle")
+
+    def load(self, room_type):
+        source = self.source_path(room_type)
+        if not os.path.exists(source):
+            raise KeyError(f"No templates for room type {room_type!r} in {self.directory}")
+        stat = os.stat(source)
+        key = (CACHE_VERSION, TILE_SIZE, ROOM_WIDTH, ROOM_HEIGHT,
+               stat.st_mtime_ns, stat.st_size)
+
+        compiled = self.read_cache(room_type, key)
+        if compiled is None:
+            compiled = self.compile(room_type)
+            self.write_cache(room_type, key, compiled)
+
+        return TemplateSet(room_type, [RoomTemplate(self.resolve(objects, room_type),
+                                                    allowed, weight)
+                                       for objects, allowed, weight in compiled])
+
+    def compile(self, room_type):
+        with open(self.source_path(room_type), 'r') as file:
+            templates = json.load(file)
+        if not isinstance(templates, list) or not templates:
+            raise ValueError(f"{room_type}.json: expected a non empty list of templates")
+        return [compile_template(template, f"{room_type}.json, template {i}")
+                for i, template in enumerate(templates)]
+
+    def read_cache(self, room_type, key):
+        try:
+            with open(self.cache_path(room_type), 'rb') as file:
+                cached = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if not isinstance(cached, dict) or cached.get("key") != key:
+            return None
+        return cached["templates"]
+
+    #  A read only template directory only costs compiling again next time
+    def write_cache(self, room_type, key, compiled):
+        try:
+            with open(self.cache_path(room_type), 'wb') as file:
+                pickle.dump({"key": key, "templates": compiled}, file,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            pass
+
+    #  Type names are looked up when a room type is loaded rather than when it
+    #  is compiled, since object modules register themselves in globals.types
+    def resolve(self, objects, room_type):
+        resolved = []
+        for name, x, y, params in objects:
+            if name not in types:
+                raise ValueError(f"{room_type}.json: unknown object type {name!r}")
+            resolved.append((types[name], x, y, params))
+        return tuple(resolved)
+
+
+templates = TemplateLibrary()
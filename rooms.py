@@ -1,13 +1,10 @@
-from random import random, randint, choice
-from itertools import zip_longest
+from random import random, randint, choice, getrandbits, getstate, setstate, seed
 import numpy as np
-import matplotlib.pyplot as plt
-import os
-import json
 from game_object import GameObject
 from physics import RigidBody, RectCollider, Vector
 from debug_sprites import colors, RectSprite
-from globals import TILE_SIZE, types, ROOM_WIDTH, ROOM_HEIGHT, WALL_SIZE
+from globals import TILE_SIZE, ROOM_WIDTH, ROOM_HEIGHT, WALL_SIZE
+from room_templates import templates, door_mask
 import layers
 
 DOWN = 0
@@ -22,15 +19,8 @@ mirror = {
     LEFT: RIGHT
 }
 
-templates = {}
-
-for file_name in os.listdir("templates"):
-    with open(os.path.join("templates", file_name), 'r') as file:
-        templates[os.path.basename(file_name).split('.')[0]] = json.load(file)
-
-
 class Barrier(GameObject):
-    pass
+    static = True
 
 
 class Door(Barrier):
@@ -62,6 +52,10 @@ class Door(Barrier):
         self.on_collide += enter_door
         self.on_mount += door_mount
 
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self.sprite.reset(colors.WHITE if enabled else colors.BROWN, self.body.collider.size())
+
 
 def door_mount(self):
     self.disable_collide = False
@@ -98,27 +92,34 @@ class Room:
         self.position = position
         self.objects = []
         self.type = "normal"
+        self.template = None
+        self.seed = None
+        self.door_directions = []
+        self.populated = False
 
-    def populate(self, neighbors):
-        template = choice(templates[self.type])
-        if "neighbors" in template and not all(available or not actual
-                                               for available, actual
-                                               in zip(template["neighbors"], neighbors)):
-            return False
+    #  Only picks the template and a seed for the objects, which are built by
+    #  populate the first time the room is entered or prefetched
+    def plan(self, neighbors):
+        self.template = templates[self.type].choose(door_mask(neighbors))
+        self.seed = getrandbits(32)
+        self.door_directions = [direction for direction in MapGenerator.directions
+                                if neighbors[direction]]
 
-        for obj in template["objects"]:
-            self.objects.append(types[obj["type"]](position=Vector(*obj["position"]) * TILE_SIZE
-                                                   + (TILE_SIZE / 2, TILE_SIZE / 2),
-                                                   **obj.get("params", {})))
+    def populate(self):
+        if self.populated:
+            return
+
+        state = getstate()
+        seed(self.seed)
+        self.objects.extend(self.template.instantiate())
+        setstate(state)
 
-        self.door_directions = []
         for direction in MapGenerator.directions:
             self.objects.append(Wall(direction))
-            if neighbors[direction]:
-                self.door_directions.append(direction)
+            if direction in self.door_directions:
                 self.objects.append(Door(direction))
 
-        return True
+        self.populated = True
 
     def __repr__(self):
         return f"Room({str(self.position)})"
@@ -130,13 +131,58 @@ class DeadendRoom(Room):
         self.type = None
 
 
+#  Set with constant time add, discard and uniform random choice
+class RandomSet:
+    def __init__(self):
+        self.items = []
+        self.indices = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.indices
+
+    def add(self, item):
+        if item not in self.indices:
+            self.indices[item] = len(self.items)
+            self.items.append(item)
+
+    def discard(self, item):
+        index = self.indices.pop(item, None)
+        if index is None:
+            return
+        last = self.items.pop()
+        if index < len(self.items):
+            self.items[index] = last
+            self.indices[last] = index
+
+    def choice(self):
+        return self.items[randint(0, len(self.items) - 1)]
+
+
+def distance(position):
+    return abs(position[0]) + abs(position[1])
+
+
+#  Keeps the rooms that still have a free side and the empty cells touching
+#  exactly one normal room, so every room and dead end is placed with a single
+#  draw instead of retrying random candidates until one happens to fit
 class MapGenerator:
     neighbor_offsets = [(0, 1), (0, -1), (1, 0), (-1, 0)]
     directions = [DOWN, UP, RIGHT, LEFT]
+    deadend_types = ['boss', 'shop', 'gold']
 
     def __init__(self, **kwargs):
-        self.rooms = [Room((0, 0))]
-        self.positions = {(0, 0): 0}
+        self.reset()
+
+    def reset(self):
+        self.rooms = []
+        self.positions = {}
+        self.touching = {}
+        self.open_rooms = RandomSet()
+        self.deadend_cells = RandomSet()
+        self.add_room(Room((0, 0)))
 
     def get_from_pos(self, pos):
         return self.rooms[self.positions[pos]]
@@ -151,102 +197,118 @@ class MapGenerator:
                                     position[1] + offset[1]), None) is not None
                 for offset in MapGenerator.neighbor_offsets]
 
-    def generate_neighbor(self, index):
-        room = self.rooms[index]
-        neighbors = self.get_surrounding(room.position)
-        if room.position == (0, 0):
-            direction = choice(MapGenerator.directions)
-        else:
-            if random() > .4:
-                direction = choice(MapGenerator.directions)
-            else:
-                direction = choice([mirror[i]
-                                   for i, neighbor in enumerate(neighbors)
-                                   if neighbor])
-        if neighbors[direction]:
-            return None
-        return Room((room.position[0] + MapGenerator.neighbor_offsets[direction][0],
-                     room.position[1] + MapGenerator.neighbor_offsets[direction][1]))
-
-    def new_room(self):
-        n = random()
-        if n > .4:
-            new_room = self.generate_neighbor(-1)
-        elif n > .2 and len(self.rooms) > 1:
-            new_room = self.generate_neighbor(-2)
-        elif len(self.rooms) > 2:
-            new_room = self.generate_neighbor(randint(0, len(self.rooms) - 3))
-        else:
-            new_room = None
-        if new_room is None:
-            return None
-        self.positions[new_room.position] = len(self.rooms)
-        return new_room
+    def add_room(self, room):
+        self.positions[room.position] = len(self.rooms)
+        self.rooms.append(room)
+        self.update_frontier(room.position)
+
+    #  Only the new room's cell and the cells around it can change state, which
+    #  is tracked through how many rooms touch each cell. An empty cell is a dead
+    #  end slot from the moment a normal room touches it until a second room does
+    def update_frontier(self, position):
+        positions = self.positions
+        touching = self.touching
+        deadend_cells = self.deadend_cells
+        index = positions[position]
+        is_room = type(self.rooms[index]) is Room
+        x, y = position
+
+        deadend_cells.discard(position)
+        for dx, dy in MapGenerator.neighbor_offsets:
+            cell = (x + dx, y + dy)
+            count = touching.get(cell, 0) + 1
+            touching[cell] = count
+            neighbor = positions.get(cell)
+            if neighbor is None:
+                if count == 1:
+                    if is_room:
+                        deadend_cells.add(cell)
+                elif count == 2:
+                    deadend_cells.discard(cell)
+            elif count == 4:
+                self.open_rooms.discard(neighbor)
+        if is_room and touching.get(position, 0) < 4:
+            self.open_rooms.add(index)
+
+    #  Mostly grows from the newest rooms, and half of the time prefers going
+    #  straight on, away from a room the parent is already attached to
+    def grow_from(self, index):
+        position = self.rooms[index].position
+        neighbors = self.get_surrounding(position)
+        free = [direction for direction in MapGenerator.directions if not neighbors[direction]]
+        if position != (0, 0) and random() <= .4:
+            straight = [mirror[direction] for direction in MapGenerator.directions
+                        if neighbors[direction] and not neighbors[mirror[direction]]]
+            if straight:
+                free = straight
+        offset = MapGenerator.neighbor_offsets[choice(free)]
+        return Room((position[0] + offset[0], position[1] + offset[1]))
 
     def add_rooms(self, amount):
         while len(self.rooms) < amount:
-            new_room = self.new_room()
-            while new_room is None:
-                new_room = self.new_room()
-            self.positions[new_room.position] = len(self.rooms)
-            self.rooms.append(new_room)
-
-    def new_deadend(self):
-        index = randint(0, len(self.rooms) - 1)
-        if type(self.rooms[index]) is not Room:
-            return None
-        possible_directions = [i for i, neighbor in
-                               enumerate(self.get_surrounding(self.rooms[index].position))
-                               if not neighbor]
-        if len(possible_directions) == 0:
-            return None
-        direction = choice(possible_directions)
-        pos = (self.rooms[index].position[0] + MapGenerator.neighbor_offsets[direction][0],
-               self.rooms[index].position[1] + MapGenerator.neighbor_offsets[direction][1])
-        neighbor_rooms_total = sum(self.get_surrounding(pos))
-        if neighbor_rooms_total != 1:
-            return None
-        else:
-            return DeadendRoom(pos)
+            n = random()
+            if n > .4 or len(self.rooms) == 1:
+                index = len(self.rooms) - 1
+            elif n > .2 or len(self.rooms) == 2:
+                index = len(self.rooms) - 2
+            else:
+                index = randint(0, len(self.rooms) - 3)
+            if index not in self.open_rooms:
+                index = self.open_rooms.choice()
+            self.add_room(self.grow_from(index))
 
+    #  The furthest dead ends become the special rooms, the boss room first
     def add_deadends(self, amount):
-        start_len = len(self.rooms)
-        sorted_distances = []
-
-        while len(self.rooms) - amount < start_len:
-            new_room = self.new_deadend()
-            while new_room is None:
-                new_room = self.new_deadend()
-            self.positions[new_room.position] = len(self.rooms)
-            current_distance = new_room.position[0] + new_room.position[1]
-            for i, (distance, room) in enumerate(sorted_distances):
-                if distance < current_distance:
-                    sorted_distances.insert(i, (current_distance, new_room))
-                    break
+        deadends = []
+        for i in range(amount):
+            if not self.deadend_cells:
+                raise ValueError(f"No free cell left for dead end {i + 1} of {amount}")
+            room = DeadendRoom(self.deadend_cells.choice())
+            self.add_room(room)
+            deadends.append(room)
+
+        deadends.sort(key=lambda room: distance(room.position), reverse=True)
+        for i, room in enumerate(deadends):
+            if i < len(MapGenerator.deadend_types):
+                room.type = MapGenerator.deadend_types[i]
             else:
-                sorted_distances.append((current_distance, new_room))
-            self.rooms.append(new_room)
-
-        types = ['boss', 'shop', 'gold']
-
-        for (_, room), type in zip_longest(sorted_distances, types, fillvalue="normal"):
-            room.type = type
+                room.type = "normal"
 
-    def populate_rooms(self):
+    def plan_rooms(self):
         for room in self.rooms:
-            populated = False
-            while not populated:
-                populated = room.populate(self.get_surrounding(room.position))
+            room.plan(self.get_surrounding(room.position))
+
+    #  Builds the rooms behind the doors of this one ahead of time, so walking
+    #  through a door only has to add objects that already exist
+    def prefetch(self, room):
+        for direction in room.door_directions:
+            self.get_neighbor(room, direction).populate()
+
+    #  A layout can leave too few cells for the dead ends. It is then built
+    #  again from scratch, up to `attempts` times
+    def generate_layout(self, amount, deadends, attempts=10):
+        for attempt in range(attempts):
+            if attempt:
+                self.reset()
+            self.add_rooms(amount - deadends)
+            try:
+                self.add_deadends(deadends)
+            except ValueError:
+                if attempt == attempts - 1:
+                    raise
+            else:
+                return attempt + 1
 
-    def generate_map(self, amount, deadends):
-        self.add_rooms(amount - deadends)
-        self.add_deadends(deadends)
-        self.populate_rooms()
+    def generate_map(self, amount, deadends, attempts=10):
+        self.generate_layout(amount, deadends, attempts)
+        self.plan_rooms()
 
 
 if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
     mg = MapGenerator()
-    mg.generate_map(20, 5)
+    mg.generate_layout(20, 5)
 
     img = np.full((25, 25, 3), 0)
 
@@ -0,0 +1,51 @@
+import pygame as pg
+
+
+class WallClock:
+    def __init__(self):
+        self.clock = pg.time.Clock()
+
+    def tick(self, framerate=0):
+        return self.clock.tick(framerate)
+
+    def get_time(self):
+        return self.clock.get_time()
+
+    def get_ticks(self):
+        return pg.time.get_ticks()
+
+
+#  Advances by exactly one frame per tick without ever sleeping, so headless
+#  games run as fast as the CPU allows while seeing the same frame times
+class SimulationClock:
+    def __init__(self):
+        self.ticks = 0
+        self.frame_time = 0
+
+    def tick(self, framerate=0):
+        self.frame_time = 1000 / framerate if framerate else 0
+        self.ticks += self.frame_time
+        return self.frame_time
+
+    def get_time(self):
+        return self.frame_time
+
+    def get_ticks(self):
+        return self.ticks
+
+
+class VirtualKeys:
+    def __init__(self):
+        self.pressed = set()
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+    def press(self, *keys):
+        self.pressed.update(keys)
+
+    def release(self, *keys):
+        self.pressed.difference_update(keys)
+
+    def release_all(self):
+        self.pressed.clear()
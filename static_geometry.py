@@ -0,0 +1,85 @@
+from globals import TILE_SIZE
+from rooms import Barrier, DOWN, UP, RIGHT, LEFT
+import layers
+
+
+#  Walls, doors and rocks never move, so instead of going through the pair
+#  loop they are looked up from where a dynamic object currently is: barriers
+#  only when it crosses the inner edge of their side of the room, everything
+#  else through the tile it occupies
+class StaticGeometry:
+    def __init__(self):
+        self.tiles = {}
+        self.barriers = {direction: [] for direction in (DOWN, UP, RIGHT, LEFT)}
+        self.edges = {}
+
+    def add(self, obj):
+        if isinstance(obj, Barrier):
+            self.barriers[obj.direction].append(obj)
+            self._update_edge(obj.direction)
+        else:
+            self.tiles.setdefault(self.tile(obj.body.collider.center()), []).append(obj)
+
+    def remove(self, obj):
+        if isinstance(obj, Barrier):
+            self.barriers[obj.direction].remove(obj)
+            self._update_edge(obj.direction)
+        else:
+            key = self.tile(obj.body.collider.center())
+            self.tiles[key].remove(obj)
+            if not self.tiles[key]:
+                del self.tiles[key]
+
+    def clear(self):
+        self.tiles.clear()
+        for direction, barriers in self.barriers.items():
+            barriers.clear()
+        self.edges.clear()
+
+    def tile(self, position):
+        return (int(position.x // TILE_SIZE), int(position.y // TILE_SIZE))
+
+    def _update_edge(self, direction):
+        colliders = [barrier.body.collider for barrier in self.barriers[direction]]
+        if not colliders:
+            self.edges.pop(direction, None)
+        elif direction == DOWN:
+            self.edges[direction] = min(collider.top_left().y for collider in colliders)
+        elif direction == UP:
+            self.edges[direction] = max(collider.bottom_right().y for collider in colliders)
+        elif direction == RIGHT:
+            self.edges[direction] = min(collider.top_left().x for collider in colliders)
+        else:
+            self.edges[direction] = max(collider.bottom_right().x for collider in colliders)
+
+    def _crossed_sides(self, top_left, bottom_right):
+        edges = self.edges
+        if DOWN in edges and bottom_right.y >= edges[DOWN]:
+            yield DOWN
+        if UP in edges and top_left.y <= edges[UP]:
+            yield UP
+        if RIGHT in edges and bottom_right.x >= edges[RIGHT]:
+            yield RIGHT
+        if LEFT in edges and top_left.x <= edges[LEFT]:
+            yield LEFT
+
+    def candidates(self, collider):
+        return self.query(collider.top_left(), collider.bottom_right())
+
+    def query(self, top_left, bottom_right):
+        for direction in self._crossed_sides(top_left, bottom_right):
+            yield from self.barriers[direction]
+
+        x0, y0 = self.tile(top_left)
+        x1, y1 = self.tile(bottom_right)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                yield from self.tiles.get((x, y), ())
+
+    def contacts(self, objects):
+        for obj in objects:
+            mask = layers.masks[obj.layer]
+            collider = obj.body.collider
+            for static in list(self.candidates(collider)):
+                if mask >> static.layer & 1 and collider.is_colliding(static.body.collider):
+                    yield obj, static
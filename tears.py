@@ -1,6 +1,7 @@
 from game_object import GameObject
 from physics import CircleCollider, KinematicBody, Vector
 from debug_sprites import CircleSprite, colors
+from pools import ObjectPool
 import layers
 
 
@@ -16,7 +17,8 @@ class PlayerTear(GameObject):
                                   radius=radius,
                                   position=position,
                                   velocity=velocity,
-                                  disable_collide=True)
+                                  disable_collide=True,
+                                  continuous=True)
 
         self.sprite = CircleSprite(colors.BLUE, radius)
 
@@ -24,6 +26,7 @@ class PlayerTear(GameObject):
 
         self.speed = kwargs.get("speed", Vector(*velocity).magnitude())
         self.remaining_range = range
+        self.last_position = Vector(*position)
 
         self.damage = damage
 
@@ -31,6 +34,22 @@ class PlayerTear(GameObject):
         self.on_collide += kill_on_obstacle
         self.on_collide += damage_enemies
 
+    def reset(self, *, position, velocity, range, damage, **kwargs):
+        super().reset()
+        radius = kwargs.get("radius", damage_to_radius(damage))
+
+        self.body.reset(radius=radius, position=position, velocity=velocity)
+        self.sprite.reset(colors.BLUE, radius)
+
+        self.speed = kwargs.get("speed", Vector(*velocity).magnitude())
+        self.remaining_range = range
+        self.last_position = Vector(*position)
+
+        self.damage = damage
+
+
+tear_pool = ObjectPool(PlayerTear)
+
 
 def damage_enemies(self, other):
     if other.layer == layers.ENEMIES:
@@ -43,7 +62,11 @@ def kill_on_obstacle(self, other):
         self.kill()
 
 
+#  Charges the distance actually travelled, which is less than speed times
+#  delta time on a step where the sweep pulled the tear back to an impact
 def check_range(self, delta_time):
-    self.remaining_range -= self.speed * delta_time
+    position = self.body.collider.center()
+    self.remaining_range -= (position - self.last_position).magnitude()
+    self.last_position = position
     if self.remaining_range <= 0:
         self.kill()
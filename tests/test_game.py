@@ -0,0 +1,124 @@
+import os
+import sys
+import random
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+import pygame as pg  # noqa: E402
+from game import Game  # noqa: E402
+from enemy import Enemy, Fly, fly_ai  # noqa: E402
+from pickups import Coin  # noqa: E402
+from physics import Vector  # noqa: E402
+from rooms import MapGenerator, Door, mirror  # noqa: E402
+from tears import PlayerTear  # noqa: E402
+
+
+def tears(game):
+    return game.find_instances(PlayerTear)
+
+
+def assert_sprite_synced(obj):
+    top_left = obj.sprite_top_left()
+    assert (obj.sprite.rect.x, obj.sprite.rect.y) == (int(top_left.x), int(top_left.y))
+
+
+#  Tears are spawned during the update phase, after the sprites were synced,
+#  and must still be drawn where their body is on that frame, including
+#  tears reused from the pool
+def test_spawned_tear_sprite_matches_its_body():
+    game = Game(game_seed=1, headless=True)
+    game.keys.press(pg.K_UP)
+    spawned = []
+    for _ in range(300):
+        before = set(tears(game))
+        game.step(1)
+        for tear in tears(game):
+            if tear not in before:
+                assert_sprite_synced(tear)
+                spawned.append(tear)
+    assert len(spawned) > len(set(spawned))
+
+
+#  A tear covering 600px per step is pulled back to the fly by the sweep, and
+#  must not run out of range on the distance it never travelled
+@pytest.mark.parametrize("fixed_timestep", [1 / 10, 1 / 20, 1 / 60])
+def test_fast_tear_hits_on_coarse_steps(fixed_timestep):
+    game = Game(game_seed=1, headless=True, fixed_timestep=fixed_timestep)
+    player = game.player
+    shot_speed = player.shot_speed
+    player.shot_speed = 6000
+    try:
+        fly = Fly(position=player.body.collider.center() - Vector(0, 150))
+        fly.on_update -= fly_ai
+        game.add(fly)
+        game.keys.press(pg.K_UP)
+        for _ in range(30):
+            game.step(1)
+            if tears(game):
+                game.keys.release_all()
+    finally:
+        player.shot_speed = shot_speed
+    assert fly.health < 100
+
+
+def test_tags_changed_directly_do_not_break_removal():
+    game = Game(game_seed=1, headless=True)
+    fly = Fly(position=game.room_center())
+    fly.tags.append("marked")
+    game.add(fly)
+    fly.tags.append("late")
+    fly.tags.remove("marked")
+    game.add_tag(fly, "tracked")
+    game.remove_tag(fly, "late")
+    game.remove(fly)
+    assert game.find_objects("tracked") == []
+
+
+def contact_set(contacts):
+    return {frozenset((obj, other)) for obj, other, _ in contacts}
+
+
+#  Sleeping bodies are skipped against each other and against static geometry
+#  by the broadphase path only
+def at_rest(obj):
+    return obj.static or obj.body.sleeping
+
+
+#  Plays seeded random input through several rooms crowded with extra flies
+#  and coins, and compares, before every frame, the contacts found through the
+#  spatial hash with the brute force ones
+def test_broadphase_contacts_match_brute_force():
+    random.seed(5)
+    rng = random.Random(7)
+    game = Game(game_seed=3, headless=True)
+    keys = [pg.K_w, pg.K_a, pg.K_s, pg.K_d, pg.K_UP, pg.K_LEFT, pg.K_e]
+    room = None
+    compared = 0
+    for frame in range(900):
+        if game.current_room is not room:
+            room = game.current_room
+            for _ in range(8):
+                position = Vector(rng.uniform(100, game.width - 100),
+                                  rng.uniform(100, game.height - 100))
+                game.add(Fly(position=position) if rng.random() < .6
+                         else Coin(position=position))
+        if frame % 150 == 100:
+            for enemy in game.find_instances(Enemy):
+                enemy.damage(10000)
+        if frame % 150 == 125 and game.room_completed:
+            direction = rng.choice(game.current_room.door_directions)
+            offset = Vector(*MapGenerator.neighbor_offsets[mirror[direction]]) * 15
+            game.player.body.collider.move_to(Door.positions[direction] + offset)
+        if frame % 20 == 0:
+            game.keys.release_all()
+            game.keys.press(*rng.sample(keys, 3))
+
+        found = contact_set(game.find_contacts())
+        brute_force = {pair for pair in contact_set(game.narrowphase(game.brute_force_pairs()))
+                       if not all(at_rest(obj) for obj in pair)}
+        assert found == brute_force, frame
+        compared += len(found)
+        game.step(1)
+    assert compared
@@ -0,0 +1,146 @@
+import os
+import sys
+import random
+import numpy as np
+from copy import copy
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from types import SimpleNamespace  # noqa: E402
+from physics import (Vector, Vec2Array, RectCollider, CircleCollider,  # noqa: E402
+                     RigidBody, PhysicsWorld,
+                     collision_manifold, batch_narrowphase, detect_collision_CircleCircle,
+                     detect_collision_RectCircle, sweep_circle, sweep_circle_rect)
+
+
+def test_zero_vector_normal_is_zero():
+    assert tuple(Vector(0, 0).normal()) == (0, 0)
+    vector = Vector(0, 0)
+    vector.normalize()
+    assert tuple(vector) == (0, 0)
+    assert tuple(Vector(3, 4).normal()) == pytest.approx((.6, .8))
+
+
+def test_zero_rows_normal_is_zero():
+    vectors = Vec2Array([(0, 0), (3, 4)])
+    assert np.allclose(vectors.normal().data, [[0, 0], [.6, .8]])
+    vectors.normalize()
+    assert np.allclose(vectors.data, [[0, 0], [.6, .8]])
+
+
+def test_vec2array_operands():
+    vectors = Vec2Array([(1, 2), (3, 4)])
+    assert (vectors + np.array([10, 20])).data.tolist() == [[11, 22], [13, 24]]
+    assert (vectors * np.array([[2], [3]])).data.tolist() == [[2, 4], [9, 12]]
+    assert (vectors - Vector(1, 1)).data.tolist() == [[0, 1], [2, 3]]
+    with pytest.raises(ValueError):
+        Vec2Array([(1, 2), (3, 4), (5, 6)]) * np.array([1, 2, 3])
+
+
+def circle(radius, x, y):
+    return CircleCollider(radius, (x, y))
+
+
+def rect(width, height, x, y):
+    return RectCollider((width, height), (x, y))
+
+
+#  Overlapping, touching and coincident circle/circle and circle/rect pairs,
+#  both ways round, plus seeded random overlaps
+def narrowphase_pairs():
+    pairs = [
+        (circle(10, 0, 0), circle(10, 15, 0)),
+        (circle(10, 0, 0), circle(5, 0, 15)),
+        (circle(10, 3, 4), circle(6, 3, 4)),
+        (circle(5, 0, 0), rect(20, 10, 0, 0)),
+        (rect(20, 10, 0, 0), circle(5, 3, 1)),
+        (circle(5, 0, 10), rect(20, 10, 0, 0)),
+        (rect(20, 10, 0, 0), circle(5, 15, 0)),
+        (circle(5, 13, 9), rect(20, 10, 0, 0)),
+        (circle(5, 18, 13), rect(20, 10, 0, 0)),
+    ]
+    rng = random.Random(3)
+    for _ in range(200):
+        x, y = rng.uniform(-30, 30), rng.uniform(-30, 30)
+        if rng.random() < .5:
+            pairs.append((circle(rng.uniform(1, 20), 0, 0), circle(rng.uniform(1, 20), x, y)))
+        else:
+            shapes = (circle(rng.uniform(1, 20), x, y),
+                      rect(rng.uniform(1, 40), rng.uniform(1, 40), 0, 0))
+            pairs.append(shapes if rng.random() < .5 else shapes[::-1])
+    return pairs
+
+
+def packed(colliders):
+    centers = np.array([tuple(collider.center()) for collider in colliders], dtype=float)
+    is_rect = np.array([type(collider) is RectCollider for collider in colliders])
+    half = np.array([(collider.width / 2, collider.height / 2) if type(collider) is RectCollider
+                     else (collider.radius, collider.radius) for collider in colliders])
+    return centers, half, is_rect
+
+
+def test_batch_narrowphase_matches_scalar():
+    pairs = narrowphase_pairs()
+    hit, normal, penetration = batch_narrowphase(*packed([a for a, b in pairs]),
+                                                 *packed([b for a, b in pairs]))
+    for i, (a, b) in enumerate(pairs):
+        if type(a) is CircleCollider and type(b) is CircleCollider:
+            scalar_hit = detect_collision_CircleCircle(a, b)
+        elif type(a) is RectCollider:
+            scalar_hit = detect_collision_RectCircle(a, b)
+        else:
+            scalar_hit = detect_collision_RectCircle(b, a)
+        scalar_normal, scalar_penetration = collision_manifold(SimpleNamespace(collider=a),
+                                                               SimpleNamespace(collider=b))
+        assert hit[i] == scalar_hit, (i, a, b)
+        if scalar_hit:
+            assert np.allclose(normal[i], tuple(scalar_normal)), (i, a, b)
+            assert penetration[i] == pytest.approx(scalar_penetration), (i, a, b)
+
+
+def test_sweep_circle_circle():
+    start, motion = Vector(0, 0), Vector(100, 0)
+    assert sweep_circle(start, 5, motion, circle(5, 50, 0)) == pytest.approx(.4)
+    assert sweep_circle(start, 5, motion, circle(5, 3, 4)) == 0
+    assert sweep_circle(start, 5, motion, circle(5, 50, 20)) is None
+    assert sweep_circle(start, 5, motion, circle(5, 150, 0)) is None
+    assert sweep_circle(start, 5, -motion, circle(5, 50, 0)) is None
+    assert sweep_circle(start, 5, Vector(0, 0), circle(5, 50, 0)) is None
+
+
+def test_sweep_circle_rect():
+    start, motion = Vector(0, 0), Vector(100, 0)
+    assert sweep_circle_rect(start, 5, motion, rect(20, 20, 50, 0)) == pytest.approx(.35)
+    assert sweep_circle_rect(start, 5, motion, rect(20, 20, 2, 0)) == 0
+    assert sweep_circle_rect(start, 5, motion, rect(20, 20, 50, 20)) is None
+    assert sweep_circle_rect(start, 5, motion, rect(20, 20, 150, 0)) is None
+    #  Entering the grown rect through a corner only hits the rounded corner
+    assert sweep_circle_rect(start, 5, motion, rect(20, 20, 50, 13)) == pytest.approx(.36)
+    assert sweep_circle_rect(start, 2, Vector(100, 100), rect(10, 10, 51.5, 38.5)) is None
+    assert sweep_circle_rect(start, 3, Vector(100, 100), rect(10, 10, 51.5, 38.5)) is not None
+    assert sweep_circle(start, 5, motion, rect(20, 20, 50, 0)) == pytest.approx(.35)
+
+
+def test_world_fields_are_read_only_copies():
+    body = RigidBody(collider=CircleCollider, radius=5, position=(10, 20))
+    body.velocity.x = 1
+    assert tuple(body.velocity) == (1, 0)
+
+    PhysicsWorld().add(body)
+    changes = [lambda: setattr(body.velocity, "x", 3),
+               lambda: body.velocity.normalize(),
+               lambda: body.velocity.set(1, 2),
+               lambda: body.total_force.add_scaled(Vector(1, 1), 2)]
+    for change in changes:
+        with pytest.raises(AttributeError):
+            change()
+
+    body.velocity += (2, 3)
+    body.velocity *= 2
+    body.collider.move((1, 1))
+    assert tuple(body.velocity) == (6, 6)
+    assert tuple(body.collider.center()) == (11, 21)
+    moved = copy(body.collider.center())
+    moved.x += 1
+    assert tuple(body.collider.center()) == (11, 21)
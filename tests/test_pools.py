@@ -0,0 +1,31 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pools import ObjectPool  # noqa: E402
+from tears import PlayerTear  # noqa: E402
+
+
+def tear_arguments():
+    return {"position": (10, 10), "velocity": (100, 0), "range": 50, "damage": 20}
+
+
+def test_reused_objects_drop_added_handlers_and_tags():
+    pool = ObjectPool(PlayerTear)
+    tear = pool.acquire(**tear_arguments())
+    defaults = tear.on_collide.callbacks
+
+    def extra(self, other):
+        pass
+
+    tear.on_collide += extra
+    tear.on_kill += extra
+    tear.tags.append("homing")
+    pool.release(tear)
+
+    reused = pool.acquire(**tear_arguments())
+    assert reused is tear
+    assert reused.on_collide.callbacks == defaults
+    assert len(reused.on_kill) == 0
+    assert reused.tags == []
@@ -0,0 +1,81 @@
+import os
+import sys
+import random
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import assets  # noqa: E402,F401
+import room_templates  # noqa: E402
+from room_templates import (compile_template, templates, door_mask, RoomTemplate,  # noqa: E402
+                            TemplateSet, ALL_DOORS)
+
+WHERE = "normal.json, template 3"
+
+
+@pytest.mark.parametrize("obj", [
+    "Rock",
+    ["Rock", 1, 2],
+    {"type": "Rock"},
+    {"type": "Rock", "position": [1]},
+    {"type": "Rock", "position": [1, 2, 3]},
+    {"type": "Rock", "position": 4},
+    {"type": "Rock", "position": [-1, 2]},
+    {"type": "Rock", "position": [1, 2], "params": []},
+])
+def test_invalid_objects_name_the_template_and_entry(obj):
+    with pytest.raises(ValueError, match=f"^{WHERE}, object 1: "):
+        compile_template({"objects": [{"type": "Rock", "position": [0, 0]}, obj]}, WHERE)
+
+
+def test_shipped_templates_compile():
+    for room_type in templates.room_types():
+        assert templates.compile(room_type)
+
+
+def test_cache_is_rebuilt_when_the_tile_size_changes(tmp_path, monkeypatch):
+    (tmp_path / "normal.json").write_text(
+        '[{"objects": [{"type": "Rock", "position": [1, 2]}]}]')
+
+    def first_position():
+        library = room_templates.TemplateLibrary(str(tmp_path))
+        (template,) = library["normal"]
+        return template.objects[0][1:3]
+
+    tile = room_templates.TILE_SIZE
+    assert first_position() == (1.5 * tile, 2.5 * tile)
+    assert (tmp_path / "normal.pickle").exists()
+    monkeypatch.setattr(room_templates, "TILE_SIZE", tile * 2)
+    assert first_position() == (3 * tile, 5 * tile)
+
+
+def test_choose_only_returns_templates_allowing_the_doors():
+    random.seed(4)
+    every_side = RoomTemplate((), ALL_DOORS, weight=1)
+    vertical = RoomTemplate((), door_mask((True, True, False, False)), weight=3)
+    left = RoomTemplate((), door_mask((False, False, False, True)), weight=1)
+    never = RoomTemplate((), ALL_DOORS, weight=0)
+    template_set = TemplateSet("normal", [every_side, vertical, left, never])
+
+    for mask in range(ALL_DOORS + 1):
+        for _ in range(50):
+            assert template_set.choose(mask).allows(mask)
+
+    counts = {every_side: 0, vertical: 0, never: 0}
+    for _ in range(4000):
+        counts[template_set.choose(door_mask((True, False, False, False)))] += 1
+    assert counts[never] == 0
+    assert 2.5 < counts[vertical] / counts[every_side] < 3.5
+
+
+def test_choose_rejects_masks_no_template_allows():
+    template_set = TemplateSet("boss", [RoomTemplate((), door_mask((True, False, False, False)))])
+    assert template_set.choose(door_mask((True, False, False, False)))
+    with pytest.raises(ValueError, match="No boss template allows doors to the down, left"):
+        template_set.choose(door_mask((True, False, False, True)))
+
+
+@pytest.mark.parametrize("weight", [0, -1, "2"])
+def test_weight_must_be_positive(weight):
+    with pytest.raises(ValueError, match="weight"):
+        compile_template({"objects": [], "weight": weight}, WHERE)
@@ -0,0 +1,85 @@
+import os
+import sys
+import random
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rooms import MapGenerator, Room, DeadendRoom, distance  # noqa: E402
+
+
+def check_layout(generator, amount, deadends):
+    rooms = generator.rooms
+    assert len(rooms) == amount
+    assert len(generator.positions) == amount
+    assert all(rooms[index].position == position
+               for position, index in generator.positions.items())
+
+    reached = {(0, 0)}
+    stack = [(0, 0)]
+    while stack:
+        x, y = stack.pop()
+        for dx, dy in MapGenerator.neighbor_offsets:
+            cell = (x + dx, y + dy)
+            if cell in generator.positions and cell not in reached:
+                reached.add(cell)
+                stack.append(cell)
+    assert len(reached) == amount
+
+    ends = [room for room in rooms if type(room) is DeadendRoom]
+    assert len(ends) == deadends
+    for room in ends:
+        x, y = room.position
+        neighbors = [generator.get_from_pos((x + dx, y + dy))
+                     for dx, dy in MapGenerator.neighbor_offsets
+                     if (x + dx, y + dy) in generator.positions]
+        assert len(neighbors) == 1 and type(neighbors[0]) is Room
+
+    ends.sort(key=lambda room: distance(room.position), reverse=True)
+    special = len(MapGenerator.deadend_types)
+    assert [room.type for room in ends[:special]] == MapGenerator.deadend_types
+    assert all(room.type == "normal" for room in ends[special:])
+    assert all(room.type == "normal" for room in rooms if type(room) is Room)
+
+
+@pytest.mark.parametrize("amount, deadends", [(10, 4), (40, 8), (160, 20)])
+def test_layout_invariants(amount, deadends):
+    for floor_seed in range(100):
+        random.seed(floor_seed)
+        generator = MapGenerator()
+        attempts = generator.generate_layout(amount, deadends)
+        assert 1 <= attempts <= 10
+        check_layout(generator, amount, deadends)
+
+
+#  Large floors often leave too few dead end cells on the first attempt
+def test_layout_retries_until_the_dead_ends_fit():
+    retried = 0
+    for floor_seed in range(20):
+        random.seed(floor_seed)
+        generator = MapGenerator()
+        try:
+            attempts = generator.generate_layout(200, 40)
+        except ValueError:
+            continue
+        retried += attempts > 1
+        check_layout(generator, 200, 40)
+    assert retried
+
+
+class CountingGenerator(MapGenerator):
+    resets = 0
+
+    def reset(self):
+        self.resets += 1
+        super().reset()
+
+
+def test_layout_gives_up_after_the_last_attempt():
+    random.seed(0)
+    generator = CountingGenerator()
+    #  A lone starting room only has four cells for dead ends
+    with pytest.raises(ValueError, match="No free cell left for dead end 5 of 5"):
+        generator.generate_layout(6, 5)
+    #  One reset per attempt, the first one from __init__
+    assert generator.resets == 10
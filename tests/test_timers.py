@@ -0,0 +1,26 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timers import Scheduler  # noqa: E402
+
+
+def test_owner_sets_drop_finished_and_removed_timers():
+    scheduler = Scheduler()
+    owner = object()
+    fired = []
+    scheduler.add(1, fired.append, (1,), owner=owner)
+    removed = scheduler.add(1, fired.append, (2,), owner=owner)
+    repeating = scheduler.add(1, fired.append, (3,), interval=1, owner=owner)
+
+    scheduler.remove(removed)
+    assert removed not in scheduler.owned[owner]
+    scheduler.run(1)
+    assert fired == [1, 3]
+    assert scheduler.owned[owner] == {repeating}
+
+    scheduler.remove(repeating)
+    assert owner not in scheduler.owned
+    scheduler.run(2)
+    assert fired == [1, 3]
@@ -0,0 +1,83 @@
+from heapq import heappush, heappop
+
+
+class Timer:
+    def __init__(self, time, function, args, interval, owner):
+        self.time = time
+        self.function = function
+        self.args = args
+        self.interval = interval
+        self.owner = owner
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+#  Timers sit in a heap ordered by due time, so a frame with nothing due only
+#  looks at the top entry. Cancelled timers are dropped when they surface
+class Scheduler:
+    def __init__(self):
+        self.queue = []
+        self.counter = 0
+        self.owned = {}
+
+    def __len__(self):
+        return len(self.queue)
+
+    def add(self, time, function, args=(), *, interval=None, owner=None):
+        timer = Timer(time, function, args, interval, owner)
+        self._push(timer)
+        if owner is not None:
+            self.owned.setdefault(owner, set()).add(timer)
+        return timer
+
+    def _push(self, timer):
+        heappush(self.queue, (timer.time, self.counter, timer))
+        self.counter += 1
+
+    def remove(self, timer):
+        timer.cancel()
+        self._finished(timer)
+
+    def cancel_owner(self, owner):
+        for timer in self.owned.pop(owner, ()):
+            timer.cancel()
+
+    def clear(self):
+        self.queue.clear()
+        self.owned.clear()
+
+    #  A timer fires again on the next run if its function returns a true
+    #  value, or every `interval` seconds if it repeats
+    def run(self, current_time):
+        again = []
+
+        while self.queue and self.queue[0][0] <= current_time:
+            time, _, timer = heappop(self.queue)
+            if timer.cancelled:
+                self._finished(timer)
+                continue
+
+            result = timer.function(*timer.args)
+
+            if timer.cancelled:
+                self._finished(timer)
+                continue
+            if timer.interval is not None:
+                timer.time += timer.interval
+                again.append(timer)
+            elif result:
+                again.append(timer)
+            else:
+                self._finished(timer)
+
+        for timer in again:
+            self._push(timer)
+
+    def _finished(self, timer):
+        owned = self.owned.get(timer.owner)
+        if owned is not None:
+            owned.discard(timer)
+            if not owned:
+                del self.owned[timer.owner]
@@ -156,6 +156,40 @@ class DebugUI(UIElement):
         self.enabled = self.game.debug
 
 
+#  p50 / p95 / p99 of every frame phase over the profiler's ring buffer,
+#  rendered again every `refresh` frames
+class ProfilerOverlay(DebugUI):
+    def __init__(self, *, position, refresh=30):
+        super().__init__("profiler", position=position)
+        self.refresh = refresh
+        self.rendered_at = None
+        self.image = None
+
+    def get_render(self):
+        profiler = self.game.profiler
+        if self.rendered_at is None or profiler.count - self.rendered_at >= self.refresh:
+            self.rendered_at = profiler.count
+            self.image = self.get_image()
+        return self.image
+
+    def get_image(self):
+        profiler = self.game.profiler
+        timings = profiler.percentiles() * 1000
+        names = profiler.phases + ("total",)
+        lines = ["ms        p50    p95    p99"]
+        for i, name in enumerate(names):
+            lines.append(f"{name:<10}" + "".join(f"{value:7.2f}" for value in timings[:, i]))
+
+        renders = [fonts[SMALL].render(line, True, (0, 0, 0)) for line in lines]
+        result = pg.Surface((max(render.get_width() for render in renders) + 10,
+                             14 * len(renders) + 6))
+        result.fill((230, 230, 230))
+        for i, render in enumerate(renders):
+            result.blit(render, (5, 3 + 14 * i))
+
+        return result
+
+
 class StaticDebugUI(UIElement):
     def __init__(self, name, *, position, image):
         super().__init__(name, position=position)